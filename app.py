@@ -31,7 +31,9 @@ db.init_app(app)
 with app.app_context():
     # Import models to ensure tables are created
     import models  # noqa: F401
-    db.create_all()
+    # main_fastapi.py defaults this to off, so its workers do not each run the DDL checks at import
+    if os.environ.get("AUTO_CREATE_TABLES", "1") == "1":
+        db.create_all()
 
 # Create basic webhook routes directly in app.py for now
 from flask import request, jsonify
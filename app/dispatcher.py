@@ -176,7 +176,7 @@ Pilih menu di bawah untuk memulai:"""
                 session_id=session.id,
                 filename=filename,
                 file_path=file_path,
-                file_type=filename.split('.')[-1].lower() if '.' in filename else 'unknown',
+                file_type=filename.rpartition('.')[2].lower() if '.' in filename else 'unknown',
                 file_size=file_size
             )
             db.session.add(doc_upload)
@@ -1,13 +1,67 @@
 import os
-from typing import Dict, Any, Optional
+import types
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple
 from document_handler.parser_pdf import PDFParser
 from document_handler.parser_docx import DocxParser
 from document_handler.parser_xlsx import XlsxParser
 from document_handler.image_ocr import ImageOCR
+from utils.keyword_matcher import KeywordMatcher
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Document categories
+CATEGORY_KEYWORDS = {
+    'rab': ['rencana anggaran biaya', 'rab', 'bill of quantity', 'boq'],
+    'contract': ['kontrak', 'perjanjian', 'agreement', 'tender'],
+    'specification': ['spesifikasi', 'specification', 'spec', 'mutu'],
+    'drawing': ['gambar kerja', 'drawing', 'denah', 'potongan'],
+    'report': ['laporan', 'report', 'progress', 'evaluasi'],
+    'invoice': ['invoice', 'faktur', 'tagihan', 'pembayaran'],
+    'permit': ['izin', 'permit', 'imb', 'surat izin']
+}
+
+CONSTRUCTION_KEYWORDS = [
+    'bangunan', 'konstruksi', 'beton', 'baja', 'material',
+    'volume', 'struktur', 'pondasi', 'kolom', 'balok',
+    'arsitektur', 'sipil', 'mechanical', 'electrical'
+]
+
+TAX_KEYWORDS = [
+    'pajak', 'pph', 'ppn', 'tarif', 'withholding',
+    'final', 'fiscal', 'tax', 'npwp', 'spt'
+]
+
+TECHNICAL_INDICATORS = [
+    'sni', 'astm', 'din', 'bs', 'specification',
+    'standard', 'code', 'regulation', 'procedure'
+]
+
+# All keyword groups are matched in one pass over the text
+_CONTENT_MATCHER = KeywordMatcher({
+    **{('category', category): keywords for category, keywords in CATEGORY_KEYWORDS.items()},
+    'construction': CONSTRUCTION_KEYWORDS,
+    'tax': TAX_KEYWORDS,
+    'technical': TECHNICAL_INDICATORS
+})
+
+# File type -> (parser attribute on DocumentClassifier, unbound parse method)
+SUPPORTED_TYPES = types.MappingProxyType({
+    'pdf': ('pdf_parser', PDFParser.parse_pdf),
+    'docx': ('docx_parser', DocxParser.parse_docx),
+    'doc': ('docx_parser', DocxParser.parse_docx),  # Try with docx parser
+    'xlsx': ('xlsx_parser', XlsxParser.parse_xlsx),
+    'xls': ('xlsx_parser', XlsxParser.parse_xlsx),  # Try with xlsx parser
+    'png': ('image_ocr', ImageOCR.process_image),
+    'jpg': ('image_ocr', ImageOCR.process_image),
+    'jpeg': ('image_ocr', ImageOCR.process_image),
+    'bmp': ('image_ocr', ImageOCR.process_image),
+    'tiff': ('image_ocr', ImageOCR.process_image),
+    'gif': ('image_ocr', ImageOCR.process_image)
+})
+
 class DocumentClassifier:
     """Classify and process different types of documents"""
     
@@ -17,26 +71,20 @@ class DocumentClassifier:
         self.xlsx_parser = XlsxParser()
         self.image_ocr = ImageOCR()
         
-        self.supported_types = {
-            'pdf': self.pdf_parser.parse_pdf,
-            'docx': self.docx_parser.parse_docx,
-            'doc': self.docx_parser.parse_docx,  # Try with docx parser
-            'xlsx': self.xlsx_parser.parse_xlsx,
-            'xls': self.xlsx_parser.parse_xlsx,  # Try with xlsx parser
-            'png': self.image_ocr.process_image,
-            'jpg': self.image_ocr.process_image,
-            'jpeg': self.image_ocr.process_image,
-            'bmp': self.image_ocr.process_image,
-            'tiff': self.image_ocr.process_image,
-            'gif': self.image_ocr.process_image
-        }
+        self.image_types = set(self.image_ocr.supported_formats)
+        
+        # CPU-bound parsers run in worker processes, the rest in threads (created on first use)
+        self.cpu_bound_types = {'pdf'} | self.image_types
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
     
     def process_document(self, file_path: str, file_type: str) -> Optional[Dict[str, Any]]:
         """Process document based on its type"""
         try:
             file_type_lower = file_type.lower()
             
-            if file_type_lower not in self.supported_types:
+            parser_entry = SUPPORTED_TYPES.get(file_type_lower)
+            if parser_entry is None:
                 logger.error(f"Unsupported file type: {file_type}")
                 return {
                     'type': file_type,
@@ -46,26 +94,41 @@ class DocumentClassifier:
                 }
             
             # Get appropriate parser
-            parser_func = self.supported_types[file_type_lower]
+            parser_attr, parse = parser_entry
             
             # Process the document
-            result = parser_func(file_path)
+            result = parse(getattr(self, parser_attr), file_path)
             
-            if result and result.get('success', False):
-                # Add classification info
-                result['classification'] = self._classify_content(
-                    result.get('extracted_text', ''),
-                    file_type_lower
+            return self._finalize_result(result, file_path, file_type)
+            
+        except Exception as e:
+            logger.error(f"Error processing document {file_path}: {e}")
+            return {
+                'type': file_type,
+                'extracted_text': '',
+                'metadata': {'error': str(e)},
+                'success': False
+            }
+    
+    async def process_document_async(self, file_path: str, file_type: str) -> Optional[Dict[str, Any]]:
+        """Process document in a worker without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        try:
+            if file_type.lower() in self.cpu_bound_types:
+                if self._process_pool is None:
+                    self._process_pool = ProcessPoolExecutor()
+                return await loop.run_in_executor(
+                    self._process_pool, _process_document_in_worker, file_path, file_type
                 )
-                
-                logger.info(f"Successfully processed {file_type} document: {file_path}")
-            else:
-                logger.error(f"Failed to process document: {file_path}")
             
-            return result
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor()
+            return await loop.run_in_executor(
+                self._thread_pool, self.process_document, file_path, file_type
+            )
             
         except Exception as e:
-            logger.error(f"Error processing document {file_path}: {e}")
+            logger.error(f"Error processing document {file_path} asynchronously: {e}")
             return {
                 'type': file_type,
                 'extracted_text': '',
@@ -73,6 +136,56 @@ class DocumentClassifier:
                 'success': False
             }
     
+    async def process_batch_async(self, documents: List[Tuple[str, str]]) -> List[Optional[Dict[str, Any]]]:
+        """Process many (file_path, file_type) documents concurrently"""
+        return await asyncio.gather(
+            *(self.process_document_async(file_path, file_type) for file_path, file_type in documents)
+        )
+    
+    def shutdown(self) -> None:
+        """Shut down worker pools used by the async API"""
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
+            self._process_pool = None
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown()
+            self._thread_pool = None
+        self.image_ocr.shutdown()
+    
+    def process_documents(self, documents: List[Tuple[str, str]]) -> List[Optional[Dict[str, Any]]]:
+        """Process many (file_path, file_type) documents, running image OCR in parallel"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(documents)
+        
+        image_indexes = [i for i, (_, file_type) in enumerate(documents)
+                         if file_type.lower() in self.image_types]
+        if image_indexes:
+            image_results = self.image_ocr.process_images([documents[i][0] for i in image_indexes])
+            for i, result in zip(image_indexes, image_results):
+                file_path, file_type = documents[i]
+                results[i] = self._finalize_result(result, file_path, file_type)
+        
+        image_index_set = set(image_indexes)
+        for i, (file_path, file_type) in enumerate(documents):
+            if i not in image_index_set:
+                results[i] = self.process_document(file_path, file_type)
+        
+        return results
+    
+    def _finalize_result(self, result: Optional[Dict[str, Any]], file_path: str, file_type: str) -> Optional[Dict[str, Any]]:
+        """Attach classification info to a parser result"""
+        if result and result.get('success', False):
+            # Add classification info
+            result['classification'] = self._classify_content(
+                result.get('extracted_text', ''),
+                file_type.lower()
+            )
+            
+            logger.info(f"Successfully processed {file_type} document: {file_path}")
+        else:
+            logger.error(f"Failed to process document: {file_path}")
+        
+        return result
+    
     def _classify_content(self, text: str, file_type: str) -> Dict[str, Any]:
         """Classify document content based on text analysis"""
         classification = {
@@ -87,24 +200,14 @@ class DocumentClassifier:
             return classification
         
         text_lower = text.lower()
-        
-        # Document categories
-        category_keywords = {
-            'rab': ['rencana anggaran biaya', 'rab', 'bill of quantity', 'boq'],
-            'contract': ['kontrak', 'perjanjian', 'agreement', 'tender'],
-            'specification': ['spesifikasi', 'specification', 'spec', 'mutu'],
-            'drawing': ['gambar kerja', 'drawing', 'denah', 'potongan'],
-            'report': ['laporan', 'report', 'progress', 'evaluasi'],
-            'invoice': ['invoice', 'faktur', 'tagihan', 'pembayaran'],
-            'permit': ['izin', 'permit', 'imb', 'surat izin']
-        }
+        hits = _CONTENT_MATCHER.find(text_lower)
         
         # Find best matching category
         best_category = 'unknown'
         max_score = 0
         
-        for category, keywords in category_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text_lower)
+        for category in CATEGORY_KEYWORDS:
+            score = len(hits[('category', category)])
             if score > max_score:
                 max_score = score
                 best_category = category
@@ -112,31 +215,15 @@ class DocumentClassifier:
         classification['document_category'] = best_category
         
         # Construction relevance
-        construction_keywords = [
-            'bangunan', 'konstruksi', 'beton', 'baja', 'material',
-            'volume', 'struktur', 'pondasi', 'kolom', 'balok',
-            'arsitektur', 'sipil', 'mechanical', 'electrical'
-        ]
-        
-        construction_score = sum(1 for keyword in construction_keywords if keyword in text_lower)
+        construction_score = len(hits['construction'])
         classification['construction_relevance'] = min(construction_score / 10.0, 1.0)
         
         # Tax relevance
-        tax_keywords = [
-            'pajak', 'pph', 'ppn', 'tarif', 'withholding',
-            'final', 'fiscal', 'tax', 'npwp', 'spt'
-        ]
-        
-        tax_score = sum(1 for keyword in tax_keywords if keyword in text_lower)
+        tax_score = len(hits['tax'])
         classification['tax_relevance'] = min(tax_score / 5.0, 1.0)
         
         # Technical level
-        technical_indicators = [
-            'sni', 'astm', 'din', 'bs', 'specification',
-            'standard', 'code', 'regulation', 'procedure'
-        ]
-        
-        technical_score = sum(1 for indicator in technical_indicators if indicator in text_lower)
+        technical_score = len(hits['technical'])
         
         if technical_score >= 3:
             classification['technical_level'] = 'high'
@@ -146,16 +233,26 @@ class DocumentClassifier:
             classification['technical_level'] = 'low'
         
         # Extract key topics
-        all_topics = construction_keywords + tax_keywords + technical_indicators
-        found_topics = [topic for topic in all_topics if topic in text_lower]
-        classification['key_topics'] = list(set(found_topics))[:10]  # Limit to 10 topics
+        found_topics = hits['construction'] | hits['tax'] | hits['technical']
+        classification['key_topics'] = list(found_topics)[:10]  # Limit to 10 topics
         
         return classification
     
     def get_supported_types(self) -> list:
         """Get list of supported file types"""
-        return list(self.supported_types.keys())
+        return list(SUPPORTED_TYPES.keys())
     
     def is_supported(self, file_type: str) -> bool:
         """Check if file type is supported"""
-        return file_type.lower() in self.supported_types
\ No newline at end of file
+        return file_type.lower() in SUPPORTED_TYPES
+
+
+# Per-process classifier used by DocumentClassifier.process_document_async workers
+_worker_classifier: Optional[DocumentClassifier] = None
+
+def _process_document_in_worker(file_path: str, file_type: str) -> Optional[Dict[str, Any]]:
+    """Process one document inside a worker process"""
+    global _worker_classifier
+    if _worker_classifier is None:
+        _worker_classifier = DocumentClassifier()
+    return _worker_classifier.process_document(file_path, file_type)
@@ -1,26 +1,148 @@
+import functools
+import hashlib
 import os
-import cv2
-import numpy as np
-from PIL import Image
-import pytesseract
+import re
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, Any, Optional, List, Tuple
+from utils.keyword_matcher import KeywordMatcher
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Heavy imaging/OCR modules, imported on first use by _import_ocr_modules()
+cv2 = None
+np = None
+Image = None
+pytesseract = None
+tesserocr = None
+_ocr_modules_loaded = False
+
+def _import_ocr_modules() -> None:
+    """Import OpenCV, NumPy, Pillow and the Tesseract bindings on first use"""
+    global cv2, np, Image, pytesseract, tesserocr, _ocr_modules_loaded
+    if _ocr_modules_loaded:
+        return
+    
+    import cv2
+    import numpy as np
+    from PIL import Image
+    import pytesseract
+    
+    try:
+        import tesserocr
+    except ImportError:  # Optional in-process Tesseract binding, pytesseract is used otherwise
+        tesserocr = None
+    
+    tesseract_cmd = _find_tesseract_cached()
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    
+    _ocr_modules_loaded = True
+
+@functools.lru_cache(maxsize=1)
+def _find_tesseract_cached() -> Optional[str]:
+    """Locate the Tesseract executable once per process"""
+    # Fast path: resolve from PATH without spawning a process
+    path = shutil.which('tesseract')
+    if path:
+        logger.info(f"Found Tesseract at: {path}")
+        return path
+    
+    possible_paths = [
+        '/usr/bin/tesseract',
+        '/usr/local/bin/tesseract',
+        '/opt/homebrew/bin/tesseract'
+    ]
+    
+    for path in possible_paths:
+        try:
+            result = subprocess.run([path, '--version'], capture_output=True, text=True)
+            if result.returncode == 0:
+                logger.info(f"Found Tesseract at: {path}")
+                return path
+        except:
+            continue
+    
+    logger.warning("Tesseract not found in common locations")
+    return None
+
+# Technical content patterns, compiled once at import. They scan UTF-8 bytes, so
+# non-ASCII symbols are spelled out as byte sequences (× ² ³ ø Ø).
+_DIMENSION_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    rb'(\d+(?:\.\d+)?)\s*(?:[xX]|\xc3\x97)\s*(\d+(?:\.\d+)?)',  # 10x20
+    rb'(\d+(?:\.\d+)?)\s*m(?:m|\xc2\xb2|\xc2\xb3)?',  # 10mm, 5m²
+    rb'(\d+(?:\.\d+)?)\s*(?:cm|mm|meter)',  # 10cm, 5mm
+    rb'(?:diameter|dia\.?|\xc3\xb8|\xc3\x98)\s*(\d+(?:\.\d+)?)',  # diameter 10
+)]
+
+_SPEC_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    rb'(?:mutu|grade|class)\s*[K-]?\s*(\d+)',  # Mutu K-300
+    rb'(?:SNI|ASTM|BS|DIN)\s*[\d-]+',  # SNI 03-2847-2013
+    rb'(?:fc\'?|fy)\s*=?\s*(\d+)\s*MPa',  # fc' = 25 MPa
+)]
+
+def _decode_match(match):
+    """Decode a bytes regex match (or tuple of groups) back to str"""
+    if isinstance(match, tuple):
+        return tuple(group.decode('utf-8') for group in match)
+    return match.decode('utf-8')
+
+_TABLE_COLUMN_SPLIT = re.compile(r'\s{2,}|\t')
+
+MATERIAL_KEYWORDS = [
+    'beton', 'concrete', 'steel', 'baja', 'besi', 'kayu', 'wood',
+    'semen', 'cement', 'agregat', 'aggregate', 'pasir', 'sand',
+    'keramik', 'ceramic', 'granit', 'granite'
+]
+
+_MATERIAL_MATCHER = KeywordMatcher({'material': MATERIAL_KEYWORDS})
+
+# ImageOCR settings copied to process_images workers, so they OCR exactly like the instance
+_WORKER_SETTINGS = (
+    'supported_formats', 'max_file_size', 'confidence_early_exit', 'max_ocr_side', 'min_ocr_side',
+    'tesseract_config', 'drawing_analysis_side', 'segment_ocr', 'segment_cache_size'
+)
+
 class ImageOCR:
     """OCR processor for technical images and construction drawings"""
     
-    def __init__(self):
+    def __init__(self, confidence_early_exit: float = 85.0, segment_ocr: bool = False,
+                 segment_cache_size: int = 512):
         self.supported_formats = ['png', 'jpg', 'jpeg', 'bmp', 'tiff', 'gif']
         self.max_file_size = 20 * 1024 * 1024  # 20MB for images
+        self.confidence_early_exit = confidence_early_exit  # Skip remaining passes at this avg confidence
+        self.max_ocr_side = 2000  # Downscale larger images, Tesseract gains nothing past ~300 DPI
+        self.min_ocr_side = 1000  # Upscale smaller images towards ~300 DPI
+        self.tesseract_config = '--oem 1 --psm 6'  # LSTM engine only, single uniform text block
+        self.drawing_analysis_side = 512  # Shape heuristics don't need full resolution
         
-        # Configure Tesseract
+        # In-process Tesseract handles (one per language), reused across calls
+        self._tess_apis = {}
+        self._tess_lock = threading.Lock()  # PyTessBaseAPI is not reentrant
+        
+        # Opt-in per-block OCR (needs tesserocr). Blocks are recognized separately, so
+        # the text can differ from the single-page pass; off by default for that reason.
+        self.segment_ocr = segment_ocr
+        
+        # OCR words per text block, keyed by a hash of the block pixels. Recurring
+        # headers/logos/boilerplate across templated documents are recognized once.
+        self.segment_cache_size = segment_cache_size  # 0 disables segment caching
+        self._segment_cache: 'OrderedDict[bytes, List[Tuple[str, float]]]' = OrderedDict()
+        self._segment_cache_lock = threading.Lock()
+        
+        # Worker pool for process_images, created on first use and kept warm between calls
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._process_pool_config = None
+        self._process_pool_lock = threading.Lock()
+        
+        # Configure Tesseract (applied to pytesseract when it is first imported)
         try:
             # Try to find tesseract executable
             self.tesseract_cmd = self._find_tesseract()
-            if self.tesseract_cmd:
-                pytesseract.pytesseract.tesseract_cmd = self.tesseract_cmd
         except Exception as e:
             logger.warning(f"Tesseract configuration warning: {e}")
     
@@ -38,7 +160,7 @@ class ImageOCR:
                 return None
             
             # Check file format
-            file_ext = file_path.split('.')[-1].lower()
+            file_ext = file_path.rpartition('.')[2].lower()
             if file_ext not in self.supported_formats:
                 logger.error(f"Unsupported image format: {file_ext}")
                 return None
@@ -57,12 +179,16 @@ class ImageOCR:
                 'success': True
             }
             
-            # Load and analyze image
-            image = cv2.imread(file_path)
+            _import_ocr_modules()
+            
+            # Load and analyze image; the same buffer gives the content hash
+            image, data = self._load_image(file_path)
             if image is None:
                 logger.error(f"Failed to load image: {file_path}")
                 return None
             
+            result['metadata']['content_hash'] = hashlib.blake2b(data, digest_size=16).hexdigest()
+            
             # Get image properties
             height, width = image.shape[:2]
             result['metadata'].update({
@@ -72,47 +198,41 @@ class ImageOCR:
                 'total_pixels': width * height
             })
             
-            # Try multiple preprocessing approaches
-            ocr_results = []
-            
-            # 1. Original image
-            text, confidence = self._extract_text_with_confidence(image, language)
-            if text.strip():
-                ocr_results.append({
-                    'text': text,
-                    'confidence': confidence,
-                    'preprocessing': 'original'
-                })
+            # Normalize resolution before any preprocessing/OCR pass
+            image, scale = self._resize_for_ocr(image)
+            result['metadata']['resize_scale'] = scale
             
-            # 2. Grayscale conversion
+            # Try preprocessing approaches cheapest-first, stopping early once
+            # a pass is confident enough that the expensive ones won't help
             gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            text, confidence = self._extract_text_with_confidence(gray, language)
-            if text.strip():
-                ocr_results.append({
-                    'text': text,
-                    'confidence': confidence,
-                    'preprocessing': 'grayscale'
-                })
-            
-            # 3. Noise reduction and enhancement
-            enhanced = self._enhance_image_for_ocr(gray)
-            text, confidence = self._extract_text_with_confidence(enhanced, language)
-            if text.strip():
-                ocr_results.append({
-                    'text': text,
-                    'confidence': confidence,
-                    'preprocessing': 'enhanced'
-                })
-            
-            # 4. Binary threshold
-            _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            text, confidence = self._extract_text_with_confidence(binary, language)
-            if text.strip():
-                ocr_results.append({
-                    'text': text,
-                    'confidence': confidence,
-                    'preprocessing': 'binary'
-                })
+            
+            # Segment-level OCR needs an in-process engine; per-block subprocesses would cost more
+            blocks = None
+            if self.segment_ocr and self.segment_cache_size and tesserocr is not None:
+                blocks = self._detect_text_blocks(gray)
+                result['metadata']['text_blocks'] = len(blocks)
+            
+            # Passes run one at a time, so the derived images share one output buffer
+            pass_buffer = np.empty_like(gray)
+            preprocessing_steps = [
+                ('original', lambda: image),
+                ('grayscale', lambda: gray),
+                ('enhanced', lambda: self._enhance_image_for_ocr(gray, out=pass_buffer)),
+                ('binary', lambda: cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=pass_buffer)[1]),
+            ]
+            
+            ocr_results = []
+            for preprocessing, preprocess in preprocessing_steps:
+                text, confidence = self._extract_text_with_confidence(preprocess(), language, blocks)
+                if text.strip():
+                    ocr_results.append({
+                        'text': text,
+                        'confidence': confidence,
+                        'preprocessing': preprocessing
+                    })
+                
+                if confidence >= self.confidence_early_exit:
+                    break
             
             # Select best result
             if ocr_results:
@@ -129,7 +249,7 @@ class ImageOCR:
                 result['technical_analysis'] = technical_analysis
             
             # Detect if image contains technical drawings
-            drawing_analysis = self._analyze_drawing_content(image)
+            drawing_analysis = self._analyze_drawing_content(image, gray)
             result['drawing_analysis'] = drawing_analysis
             
             logger.info(f"OCR processed: {file_path}, confidence: {result['metadata'].get('confidence', 0):.2f}")
@@ -145,6 +265,49 @@ class ImageOCR:
                 'success': False
             }
     
+    def process_images(self, file_paths: List[str], language: str = 'eng+ind',
+                       workers: Optional[int] = None) -> List[Optional[Dict[str, Any]]]:
+        """Process many images in parallel, keeping one OCR engine warm per worker process"""
+        if not file_paths:
+            return []
+        
+        workers = min(workers or os.cpu_count() or 1, len(file_paths))
+        if workers <= 1:
+            return [self.process_image(path, language) for path in file_paths]
+        
+        try:
+            executor = self._get_process_pool(workers)
+            return list(executor.map(_process_image_in_worker, file_paths,
+                                     [language] * len(file_paths)))
+        except Exception as e:
+            logger.warning(f"Parallel OCR failed, processing images sequentially: {e}")
+            self.shutdown()  # A broken pool is rebuilt on the next call
+            return [self.process_image(path, language) for path in file_paths]
+    
+    def shutdown(self) -> None:
+        """Shut down the worker pool used by process_images"""
+        with self._process_pool_lock:
+            if self._process_pool is not None:
+                self._process_pool.shutdown()
+                self._process_pool = None
+                self._process_pool_config = None
+    
+    def _get_process_pool(self, workers: int) -> ProcessPoolExecutor:
+        """Return the worker pool, rebuilding it when the worker count or OCR settings changed"""
+        settings = {name: getattr(self, name) for name in _WORKER_SETTINGS}
+        config = (workers, settings)
+        with self._process_pool_lock:
+            if self._process_pool is not None and self._process_pool_config != config:
+                self._process_pool.shutdown()
+                self._process_pool = None
+            
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(max_workers=workers,
+                                                         initializer=_init_ocr_worker,
+                                                         initargs=(settings,))
+                self._process_pool_config = config
+            return self._process_pool
+    
     def extract_tables_from_image(self, file_path: str) -> Optional[List[List[str]]]:
         """Extract table data from image"""
         try:
@@ -164,7 +327,9 @@ class ImageOCR:
     def detect_text_regions(self, file_path: str) -> Optional[List[Dict[str, Any]]]:
         """Detect text regions in image"""
         try:
-            image = cv2.imread(file_path)
+            _import_ocr_modules()
+            
+            image, _ = self._load_image(file_path)
             if image is None:
                 return None
             
@@ -199,47 +364,50 @@ class ImageOCR:
             logger.error(f"Error in detect_text_regions: {e}")
             return None
     
+    def _load_image(self, file_path: str) -> Tuple[Any, bytes]:
+        """Read the file once and decode it, returning the image and the raw bytes"""
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        return image, data
+    
     def _find_tesseract(self) -> Optional[str]:
         """Find Tesseract executable"""
-        possible_paths = [
-            '/usr/bin/tesseract',
-            '/usr/local/bin/tesseract',
-            '/opt/homebrew/bin/tesseract',
-            'tesseract'  # In PATH
-        ]
-        
-        for path in possible_paths:
-            try:
-                import subprocess
-                result = subprocess.run([path, '--version'], capture_output=True, text=True)
-                if result.returncode == 0:
-                    logger.info(f"Found Tesseract at: {path}")
-                    return path
-            except:
-                continue
-        
-        logger.warning("Tesseract not found in common locations")
-        return None
+        return _find_tesseract_cached()
     
-    def _extract_text_with_confidence(self, image, language: str) -> Tuple[str, float]:
+    def _extract_text_with_confidence(self, image, language: str,
+                                      blocks: Optional[List[Tuple[int, int, int, int]]] = None) -> Tuple[str, float]:
         """Extract text and calculate average confidence"""
         try:
-            # Get detailed OCR data
-            data = pytesseract.image_to_data(image, lang=language, output_type=pytesseract.Output.DICT)
-            
-            text_parts = []
-            confidences = []
-            
-            for i in range(len(data['text'])):
-                conf = int(data['conf'][i])
-                text = data['text'][i].strip()
-                
-                if conf > 30 and text:  # Filter out low-confidence detections
-                    text_parts.append(text)
-                    confidences.append(conf)
-            
-            full_text = ' '.join(text_parts)
-            avg_confidence = sum(confidences) / len(confidences) if confidences else 0
+            # Get word-level OCR data as parallel text/confidence sequences
+            if blocks or tesserocr is not None:
+                if blocks:
+                    words = self._recognize_segments(image, language, blocks)
+                else:
+                    words = self._recognize_words(image, language)
+                texts, confs = zip(*words) if words else ((), ())
+            else:
+                data = pytesseract.image_to_data(
+                    image, lang=language, config=self.tesseract_config,
+                    output_type=pytesseract.Output.DICT
+                )
+                texts, confs = data['text'], data['conf']
+            
+            if not texts:
+                return "", 0.0
+            
+            # Filter out low-confidence detections with one vectorized mask,
+            # then strip only the surviving words
+            confs = np.asarray(confs, dtype=np.float64).astype(np.int32)
+            texts = np.asarray(texts, dtype=object)
+            keep = confs > 30
+            stripped = np.array([text.strip() for text in texts[keep]], dtype=object)
+            non_empty = stripped != ''
+            
+            full_text = ' '.join(stripped[non_empty])
+            kept_confs = confs[keep][non_empty]
+            avg_confidence = float(kept_confs.mean()) if kept_confs.size else 0.0
             
             return full_text, avg_confidence
             
@@ -247,19 +415,94 @@ class ImageOCR:
             logger.debug(f"Error in OCR extraction: {e}")
             return "", 0.0
     
-    def _enhance_image_for_ocr(self, gray_image):
+    def _recognize_words(self, image, language: str) -> List[Tuple[str, float]]:
+        """Run OCR in-process through a persistent tesserocr handle"""
+        with self._tess_lock:
+            api = self._tess_apis.get(language)
+            if api is None:
+                api = tesserocr.PyTessBaseAPI(
+                    lang=language,
+                    oem=tesserocr.OEM.LSTM_ONLY,
+                    psm=tesserocr.PSM.SINGLE_BLOCK
+                )
+                self._tess_apis[language] = api
+            
+            api.SetImage(Image.fromarray(image))
+            api.Recognize()
+            
+            level = tesserocr.RIL.WORD
+            words = []
+            for word in tesserocr.iterate_level(api.GetIterator(), level):
+                words.append((word.GetUTF8Text(level) or '', word.Confidence(level)))
+            
+            return words
+    
+    def _recognize_segments(self, image, language: str,
+                            blocks: List[Tuple[int, int, int, int]]) -> List[Tuple[str, float]]:
+        """OCR each text block separately, reusing cached results for identical blocks"""
+        words = []
+        for x, y, w, h in blocks:
+            crop = np.ascontiguousarray(image[y:y + h, x:x + w])
+            
+            digest = hashlib.blake2b(crop.tobytes(), digest_size=16)
+            digest.update(f"{crop.shape}|{language}".encode())
+            key = digest.digest()
+            
+            with self._segment_cache_lock:
+                block_words = self._segment_cache.get(key)
+                if block_words is not None:
+                    self._segment_cache.move_to_end(key)
+            
+            if block_words is None:
+                block_words = self._recognize_words(crop, language)
+                with self._segment_cache_lock:
+                    self._segment_cache[key] = block_words
+                    while len(self._segment_cache) > self.segment_cache_size:
+                        self._segment_cache.popitem(last=False)
+            
+            words.extend(block_words)
+        
+        return words
+    
+    def _detect_text_blocks(self, gray) -> List[Tuple[int, int, int, int]]:
+        """Find text block bounding boxes (x, y, w, h) in reading order"""
+        # Merge neighbouring glyphs into blocks with a wide dilation
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (25, 7))
+        merged = cv2.dilate(binary, kernel, iterations=1)
+        
+        contours, _ = cv2.findContours(merged, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        blocks = [cv2.boundingRect(contour) for contour in contours]
+        blocks = [block for block in blocks if block[2] >= 8 and block[3] >= 8]
+        blocks.sort(key=lambda block: (block[1], block[0]))
+        
+        return blocks
+    
+    def _resize_for_ocr(self, image) -> Tuple[Any, float]:
+        """Scale image so its longest side falls within the OCR-friendly range"""
+        longest_side = max(image.shape[:2])
+        
+        if longest_side > self.max_ocr_side:
+            scale = self.max_ocr_side / longest_side
+            interpolation = cv2.INTER_AREA
+        elif longest_side < self.min_ocr_side:
+            scale = self.min_ocr_side / longest_side
+            interpolation = cv2.INTER_CUBIC
+        else:
+            return image, 1.0
+        
+        resized = cv2.resize(image, None, fx=scale, fy=scale, interpolation=interpolation)
+        return resized, scale
+    
+    def _enhance_image_for_ocr(self, gray_image, out=None):
         """Apply image enhancement techniques for better OCR"""
         try:
             # Noise reduction
             denoised = cv2.fastNlMeansDenoising(gray_image)
             
-            # Contrast enhancement
+            # Contrast enhancement, written into `out` when a buffer is given
             clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-            enhanced = clahe.apply(denoised)
-            
-            # Morphological operations to clean up
-            kernel = np.ones((1,1), np.uint8)
-            enhanced = cv2.morphologyEx(enhanced, cv2.MORPH_CLOSE, kernel)
+            enhanced = clahe.apply(denoised, dst=out)
             
             return enhanced
             
@@ -269,8 +512,6 @@ class ImageOCR:
     
     def _analyze_technical_content(self, text: str) -> Dict[str, Any]:
         """Analyze text for technical construction content"""
-        import re
-        
         analysis = {
             'has_dimensions': False,
             'has_materials': False,
@@ -283,45 +524,27 @@ class ImageOCR:
         }
         
         text_lower = text.lower()
+        text_bytes = text.encode('utf-8', 'ignore')
         
         # Look for dimensions
-        dimension_patterns = [
-            r'(\d+(?:\.\d+)?)\s*[xX×]\s*(\d+(?:\.\d+)?)',  # 10x20
-            r'(\d+(?:\.\d+)?)\s*m[m²³]?',  # 10mm, 5m²
-            r'(\d+(?:\.\d+)?)\s*(?:cm|mm|meter)',  # 10cm, 5mm
-            r'(?:diameter|dia\.?|ø)\s*(\d+(?:\.\d+)?)',  # diameter 10
-        ]
-        
-        for pattern in dimension_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
+        for pattern in _DIMENSION_PATTERNS:
+            matches = pattern.findall(text_bytes)
             if matches:
                 analysis['has_dimensions'] = True
-                analysis['dimensions_found'].extend([str(m) for m in matches[:10]])
+                analysis['dimensions_found'].extend([str(_decode_match(m)) for m in matches[:10]])
         
         # Look for materials
-        material_keywords = [
-            'beton', 'concrete', 'steel', 'baja', 'besi', 'kayu', 'wood',
-            'semen', 'cement', 'agregat', 'aggregate', 'pasir', 'sand',
-            'keramik', 'ceramic', 'granit', 'granite'
-        ]
-        
-        for material in material_keywords:
-            if material in text_lower:
-                analysis['has_materials'] = True
-                analysis['materials_found'].append(material)
+        materials = _MATERIAL_MATCHER.find(text_lower)['material']
+        if materials:
+            analysis['has_materials'] = True
+            analysis['materials_found'] = [m for m in MATERIAL_KEYWORDS if m in materials]
         
         # Look for specifications and codes
-        spec_patterns = [
-            r'(?:mutu|grade|class)\s*[K-]?\s*(\d+)',  # Mutu K-300
-            r'(?:SNI|ASTM|BS|DIN)\s*[\d-]+',  # SNI 03-2847-2013
-            r'(?:fc\'?|fy)\s*=?\s*(\d+)\s*MPa',  # fc' = 25 MPa
-        ]
-        
-        for pattern in spec_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
+        for pattern in _SPEC_PATTERNS:
+            matches = pattern.findall(text_bytes)
             if matches:
                 analysis['has_specifications'] = True
-                analysis['codes_found'].extend([str(m) for m in matches[:5]])
+                analysis['codes_found'].extend([str(_decode_match(m)) for m in matches[:5]])
         
         # Calculate technical score
         score = 0
@@ -333,10 +556,16 @@ class ImageOCR:
         
         return analysis
     
-    def _analyze_drawing_content(self, image) -> Dict[str, Any]:
+    def _analyze_drawing_content(self, image, gray=None) -> Dict[str, Any]:
         """Analyze if image contains technical drawings"""
         try:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            if gray is None:
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            
+            # Work on a downsampled copy; thresholds below are scaled to match
+            scale = min(1.0, self.drawing_analysis_side / max(gray.shape[:2]))
+            if scale < 1.0:
+                gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
             
             analysis = {
                 'has_lines': False,
@@ -345,9 +574,9 @@ class ImageOCR:
                 'drawing_score': 0.0
             }
             
-            # Detect lines using HoughLines
+            # Detect lines using HoughLines (votes scale with line length in pixels)
             edges = cv2.Canny(gray, 50, 150, apertureSize=3)
-            lines = cv2.HoughLines(edges, 1, np.pi/180, threshold=100)
+            lines = cv2.HoughLines(edges, 1, np.pi/180, threshold=max(int(100 * scale), 20))
             
             if lines is not None:
                 analysis['has_lines'] = True
@@ -356,14 +585,21 @@ class ImageOCR:
             # Detect contours (geometric shapes)
             contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             
+            # Filter in batch first so polygon approximation only runs on candidates:
+            # enough area, and at least 3 points (fewer can never approximate to 3+ vertices)
+            areas = np.fromiter(map(cv2.contourArea, contours), dtype=np.float32, count=len(contours))
+            point_counts = np.fromiter(map(len, contours), dtype=np.int32, count=len(contours))
+            candidates = np.flatnonzero((areas > 100 * scale * scale) & (point_counts >= 3))
+            
             geometric_shapes = 0
-            for contour in contours:
+            for idx in candidates:
+                contour = contours[idx]
                 # Approximate contour to polygon
                 epsilon = 0.02 * cv2.arcLength(contour, True)
                 approx = cv2.approxPolyDP(contour, epsilon, True)
                 
                 # Count shapes with 3-8 vertices (triangles to octagons)
-                if 3 <= len(approx) <= 8 and cv2.contourArea(contour) > 100:
+                if 3 <= len(approx) <= 8:
                     geometric_shapes += 1
             
             if geometric_shapes > 5:
@@ -385,8 +621,6 @@ class ImageOCR:
     
     def _extract_tables_from_ocr_text(self, text: str) -> List[List[str]]:
         """Extract table-like structures from OCR text"""
-        import re
-        
         lines = text.split('\n')
         tables = []
         current_table = []
@@ -401,7 +635,7 @@ class ImageOCR:
             
             # Look for table-like patterns
             # Multiple numbers or values separated by spaces/tabs
-            parts = re.split(r'\s{2,}|\t', line)
+            parts = _TABLE_COLUMN_SPLIT.split(line)
             if len(parts) >= 2:
                 # Clean up parts
                 cleaned_parts = [part.strip() for part in parts if part.strip()]
@@ -422,3 +656,22 @@ class ImageOCR:
         
         # Filter out tables with less than 2 rows
         return [table for table in tables if len(table) >= 2]
+
+
+# Per-process OCR instance used by ImageOCR.process_images workers
+_worker_ocr: Optional[ImageOCR] = None
+
+def _init_ocr_worker(settings: Dict[str, Any]) -> None:
+    """Initialize an OCR worker process with the parent instance's settings"""
+    global _worker_ocr
+    # One Tesseract thread per process; parallelism comes from the pool
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    _worker_ocr = ImageOCR(confidence_early_exit=settings['confidence_early_exit'],
+                           segment_ocr=settings['segment_ocr'],
+                           segment_cache_size=settings['segment_cache_size'])
+    for name, value in settings.items():
+        setattr(_worker_ocr, name, value)
+
+def _process_image_in_worker(file_path: str, language: str) -> Optional[Dict[str, Any]]:
+    """Run OCR for one image inside a worker process"""
+    return _worker_ocr.process_image(file_path, language)
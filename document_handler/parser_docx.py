@@ -1,18 +1,219 @@
 import docx
+import functools
 import os
+import re
+import zipfile
+from itertools import islice
+from docx.oxml.ns import qn
+from lxml import etree
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, Any, Optional, List
+from utils.columnar import RecordView
+from utils.keyword_matcher import KeywordMatcher
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Parts of a DOCX that parse_docx can extract
+DOCX_SECTIONS = frozenset({'text', 'tables', 'images', 'analysis'})
+
+_PARAGRAPH_TAG = qn('w:p')
+_TABLE_TAG = qn('w:tbl')
+_BODY_TAG = qn('w:body')
+_RUN_TAG = qn('w:r')
+_HYPERLINK_TAG = qn('w:hyperlink')
+_TEXT_TAG = qn('w:t')
+_BREAK_TAG = qn('w:br')
+_BREAK_TYPE = qn('w:type')
+
+# Text equivalents of run content, as python-docx renders them
+_RUN_CONTENT_TEXT = {
+    qn('w:tab'): '\t',
+    qn('w:ptab'): '\t',
+    qn('w:cr'): '\n',
+    qn('w:noBreakHyphen'): '-'
+}
+
+_SECTION_PATTERNS = [re.compile(pattern, re.MULTILINE) for pattern in (
+    r'(?:^|\n)([A-Z][^.\n]{5,50})(?:\n|$)',  # Lines that might be section headers
+    r'(?:^|\n)(\d+\.?\s+[A-Z][^.\n]{5,50})(?:\n|$)',  # Numbered sections
+    r'(?:^|\n)([IVX]+\.?\s+[A-Z][^.\n]{5,50})(?:\n|$)'  # Roman numbered sections
+)]
+# Characters ignored when judging whether a cell is numeric: punctuation, currency
+# and every character str.isspace() accepts (the same set as regex \s)
+_NUMERIC_STRIP = str.maketrans('', '', '.,%Rp-' + ''.join(
+    chr(code) for code in range(0x3001) if chr(code).isspace()
+))
+
+# Document type indicators
+DOC_TYPE_INDICATORS = {
+    'contract': ['kontrak', 'perjanjian', 'pasal', 'ayat', 'syarat dan ketentuan', 'pihak pertama', 'pihak kedua'],
+    'specification': ['spesifikasi', 'persyaratan', 'standar', 'mutu', 'kualitas', 'metode kerja'],
+    'report': ['laporan', 'executive summary', 'kesimpulan', 'rekomendasi', 'analisis'],
+    'proposal': ['proposal', 'penawaran', 'tender', 'lelang', 'bid'],
+    'manual': ['panduan', 'petunjuk', 'prosedur', 'langkah-langkah', 'cara'],
+    'correspondence': ['surat', 'memo', 'nota', 'undangan', 'pemberitahuan']
+}
+
+FORMAL_INDICATORS = ['dengan hormat', 'yang bertanda tangan', 'demikian', 'terima kasih', 'hormat kami']
+
+STRUCTURE_INDICATORS = ['Heading', 'Title', 'Subtitle', 'List', 'Caption', 'Quote']
+# A trailing bare section number ("1.", "IV") whose \s+ may continue into the next chunk
+_SECTION_NUMBER_TAIL = re.compile(r'(?:^|\n)(?:\d+|[IVX]+)\.?\s*\Z')
+_STRUCTURE_STYLE = re.compile('|'.join(map(re.escape, STRUCTURE_INDICATORS)))
+
+# All text indicators, matched in a single pass
+_CONTENT_MATCHER = KeywordMatcher({
+    **{('type', doc_type): indicators for doc_type, indicators in DOC_TYPE_INDICATORS.items()},
+    'formal': FORMAL_INDICATORS
+})
+
+
+def _run_text(run) -> str:
+    """Text of a w:r element, matching python-docx Run.text"""
+    parts = []
+    for element in run:
+        if element.tag == _TEXT_TAG:
+            parts.append(element.text or '')
+        elif element.tag == _BREAK_TAG:
+            # Only line breaks become text; page and column breaks are dropped
+            if element.get(_BREAK_TYPE, 'textWrapping') == 'textWrapping':
+                parts.append('\n')
+        else:
+            parts.append(_RUN_CONTENT_TEXT.get(element.tag, ''))
+    return ''.join(parts)
+
+def _paragraph_text(paragraph) -> str:
+    """Text of a w:p element, matching python-docx Paragraph.text"""
+    parts = []
+    for child in paragraph:
+        if child.tag == _RUN_TAG:
+            parts.append(_run_text(child))
+        elif child.tag == _HYPERLINK_TAG:
+            parts.extend(_run_text(run) for run in child if run.tag == _RUN_TAG)
+    return ''.join(parts)
+
+def _iter_body_paragraph_texts(file_path: str):
+    """Stream body-level paragraph text from word/document.xml, freeing elements as they are read"""
+    with zipfile.ZipFile(file_path) as archive, archive.open('word/document.xml') as document_xml:
+        for _, element in etree.iterparse(document_xml, tag=(_PARAGRAPH_TAG, _TABLE_TAG)):
+            parent = element.getparent()
+            if parent is None or parent.tag != _BODY_TAG:
+                continue  # Paragraph inside a table, freed together with the table
+            
+            if element.tag == _PARAGRAPH_TAG:
+                yield _paragraph_text(element)
+            
+            element.clear()
+            while element.getprevious() is not None:
+                del parent[0]
+
+
+class DocxAnalysisAccumulator:
+    """Incremental DOCX content analysis over text chunks that end at line boundaries"""
+    
+    def __init__(self):
+        self._hits = {group: set() for group in _CONTENT_MATCHER.groups}
+        self._section_matches = [[] for _ in _SECTION_PATTERNS]
+        self._pending = None
+    
+    def feed(self, chunk: str):
+        """Add the next chunk of text, in the order it appears in extracted_text"""
+        # The last chunk is held back so finalize can strip it the way extracted_text is stripped
+        if self._pending is None:
+            if chunk and not chunk.isspace():
+                self._pending = chunk.lstrip()
+            return
+        
+        # Numbered section patterns can span the line break after a bare number
+        if _SECTION_NUMBER_TAIL.search(self._pending):
+            self._pending += "\n" + chunk
+            return
+        
+        # Blank chunks match nothing on their own
+        if not chunk or chunk.isspace():
+            return
+        
+        self._scan(self._pending)
+        self._pending = chunk
+    
+    def finalize(self, styles_used: List[str]) -> Dict[str, Any]:
+        """Return the analysis for everything fed so far"""
+        if self._pending is not None:
+            self._scan(self._pending.rstrip())
+            self._pending = None
+        
+        analysis = {
+            'document_type': 'unknown',
+            'structure_score': 0.0,
+            'content_type': 'unknown',
+            'key_sections': [],
+            'formal_level': 'unknown'
+        }
+        
+        # Determine document type based on content and structure
+        max_score = 0
+        detected_type = 'unknown'
+        
+        for doc_type in DOC_TYPE_INDICATORS:
+            score = len(self._hits[('type', doc_type)])
+            if score > max_score:
+                max_score = score
+                detected_type = doc_type
+        
+        analysis['document_type'] = detected_type
+        
+        # Analyze structure based on styles used
+        structure_score = sum(1 for style in styles_used if _STRUCTURE_STYLE.search(style))
+        analysis['structure_score'] = min(structure_score / 5.0, 1.0)  # Normalize to 0-1
+        
+        # Determine formality level
+        formal_count = len(self._hits['formal'])
+        
+        if formal_count >= 2:
+            analysis['formal_level'] = 'formal'
+        elif formal_count >= 1:
+            analysis['formal_level'] = 'semi-formal'
+        else:
+            analysis['formal_level'] = 'informal'
+        
+        # Insertion-ordered dedup; once 10 distinct sections are known later patterns can't add any
+        key_sections = {}
+        for matches in self._section_matches:
+            if len(key_sections) >= 10:
+                break
+            key_sections.update(dict.fromkeys(matches))
+        
+        analysis['key_sections'] = list(islice(key_sections, 10))
+        
+        return analysis
+    
+    def _scan(self, chunk: str):
+        """Update keyword hits and the first 10 section matches per pattern"""
+        for group, found in _CONTENT_MATCHER.find(chunk.lower()).items():
+            self._hits[group].update(found)
+        
+        for pattern, matches in zip(_SECTION_PATTERNS, self._section_matches):
+            if len(matches) < 10:
+                matches.extend(match.group(1) for match in islice(pattern.finditer(chunk), 10 - len(matches)))
+
+
+@functools.lru_cache(maxsize=8)
+def _load_document(file_path: str, mtime_ns: int, size: int):
+    """Parse a DOCX file; mtime and size are part of the key so edited files are re-read"""
+    return docx.Document(file_path)
+
+
 class DocxParser:
     """Parser for Microsoft Word DOCX documents"""
     
     def __init__(self):
         self.max_file_size = 50 * 1024 * 1024  # 50MB
         
-    def parse_docx(self, file_path: str) -> Optional[Dict[str, Any]]:
-        """Parse DOCX file and extract content and metadata"""
+    def parse_docx(self, file_path: str, sections=DOCX_SECTIONS) -> Optional[Dict[str, Any]]:
+        """Parse DOCX file and extract content and metadata, limited to the requested sections"""
         try:
             if not os.path.exists(file_path):
                 logger.error(f"DOCX file not found: {file_path}")
@@ -24,8 +225,6 @@ class DocxParser:
                 logger.error(f"DOCX file too large: {file_size} bytes")
                 return None
             
-            doc = docx.Document(file_path)
-            
             result = {
                 'type': 'docx',
                 'extracted_text': '',
@@ -36,11 +235,24 @@ class DocxParser:
                     'tables': 0,
                     'images': 0
                 },
-                'paragraphs': [],
+                # Paragraph data is kept column-wise; paragraphs is a list-of-dicts view over it
+                'paragraph_texts': [],
+                'paragraph_styles': [],
+                'paragraph_alignments': [],
                 'tables': [],
                 'styles_used': [],
                 'success': True
             }
+            result['paragraphs'] = RecordView({
+                'text': result['paragraph_texts'],
+                'style': result['paragraph_styles'],
+                'alignment': result['paragraph_alignments']
+            })
+            
+            if set(sections) == {'text'}:
+                return self._parse_text_only(file_path, result)
+            
+            doc = self._open_document(file_path)
             
             # Extract core properties
             core_props = doc.core_properties
@@ -57,51 +269,63 @@ class DocxParser:
                 'version': core_props.version or ''
             })
             
-            # Extract paragraphs
-            full_text = ""
+            # Walk the body once, collecting paragraphs and tables as we go
+            paragraph_parts = []
+            table_parts = []
+            want_analysis = 'analysis' in sections
+            accumulator = DocxAnalysisAccumulator() if want_analysis else None
             styles_used = set()
+            want_text = 'text' in sections
+            want_tables = 'tables' in sections
             
-            for para in doc.paragraphs:
-                if para.text.strip():
-                    para_data = {
-                        'text': para.text,
-                        'style': para.style.name if para.style else 'Normal',
-                        'alignment': str(para.alignment) if para.alignment else 'Unknown'
-                    }
+            for child in doc.element.body.iterchildren():
+                if child.tag == _PARAGRAPH_TAG and want_text:
+                    para = Paragraph(child, doc)
+                    para_text = para.text
+                    if not para_text or para_text.isspace():
+                        continue
                     
-                    result['paragraphs'].append(para_data)
-                    full_text += para.text + "\n"
+                    style = para.style
+                    alignment = para.alignment
+                    result['paragraph_texts'].append(para_text)
+                    result['paragraph_styles'].append(style.name if style else 'Normal')
+                    result['paragraph_alignments'].append(str(alignment) if alignment else 'Unknown')
+                    paragraph_parts.append(para_text)
+                    if want_analysis:
+                        accumulator.feed(para_text)
                     
-                    if para.style:
-                        styles_used.add(para.style.name)
-            
-            result['extracted_text'] = full_text.strip()
-            result['styles_used'] = list(styles_used)
-            result['metadata']['paragraphs'] = len(result['paragraphs'])
-            
-            # Extract tables
-            for table_idx, table in enumerate(doc.tables):
-                table_data = self._extract_table_data(table, table_idx)
-                result['tables'].append(table_data)
+                    if style:
+                        styles_used.add(style.name)
                 
-                # Add table content to extracted text
-                full_text += f"\n--- Table {table_idx + 1} ---\n"
-                for row in table_data['rows']:
-                    full_text += " | ".join(row) + "\n"
+                elif child.tag == _TABLE_TAG and want_tables:
+                    table_idx = len(result['tables'])
+                    table_data = self._extract_table_data(Table(child, doc), table_idx)
+                    result['tables'].append(table_data)
+                    
+                    # Add table content to extracted text
+                    table_parts.append(f"\n--- Table {table_idx + 1} ---")
+                    table_parts.extend(" | ".join(row) for row in table_data['rows'])
             
+            # Paragraph text first, then the tables
+            if want_analysis:
+                for part in table_parts:
+                    accumulator.feed(part)
+            result['extracted_text'] = "\n".join(paragraph_parts + table_parts).strip()
+            result['styles_used'] = list(styles_used)
+            result['metadata']['paragraphs'] = len(result['paragraph_texts'])
             result['metadata']['tables'] = len(result['tables'])
-            result['extracted_text'] = full_text.strip()
             
             # Count words and characters
             result['metadata']['total_characters'] = len(result['extracted_text'])
             result['metadata']['total_words'] = len(result['extracted_text'].split())
             
-            # Analyze content
-            content_analysis = self._analyze_docx_content(result['extracted_text'], result['styles_used'])
-            result['content_analysis'] = content_analysis
+            # Analyze content; the text was fed to the accumulator as it was extracted
+            if want_analysis:
+                result['content_analysis'] = accumulator.finalize(result['styles_used'])
             
             # Extract images info (basic)
-            result['metadata']['images'] = self._count_images(doc)
+            if 'images' in sections:
+                result['metadata']['images'] = self._count_images(doc)
             
             logger.info(f"Successfully parsed DOCX: {file_path}, {result['metadata']['paragraphs']} paragraphs, {result['metadata']['tables']} tables")
             
@@ -116,14 +340,71 @@ class DocxParser:
                 'success': False
             }
     
+    def sniff(self, file_path: str) -> Dict[str, Any]:
+        """Identify a DOCX from its zip directory without parsing the document"""
+        info = {'is_docx': False, 'part_count': 0, 'has_tables': False}
+        try:
+            with zipfile.ZipFile(file_path) as archive:
+                names = archive.namelist()
+                info['part_count'] = len(names)
+                info['is_docx'] = 'word/document.xml' in names
+                if info['is_docx']:
+                    info['has_tables'] = self._contains_table(archive)
+        except (OSError, zipfile.BadZipFile) as e:
+            logger.debug(f"Not a readable DOCX {file_path}: {e}")
+        
+        return info
+    
+    def _contains_table(self, archive: zipfile.ZipFile) -> bool:
+        """Scan document.xml for a table element in chunks, stopping at the first one"""
+        tail = b''
+        with archive.open('word/document.xml') as document_xml:
+            for chunk in iter(lambda: document_xml.read(64 * 1024), b''):
+                if b'<w:tbl>' in tail + chunk or b'<w:tbl ' in tail + chunk:
+                    return True
+                tail = chunk[-7:]
+        return False
+    
+    def parse_many(self, file_paths: List[str], workers: Optional[int] = None) -> List[Optional[Dict[str, Any]]]:
+        """Parse many DOCX files in parallel worker processes; max_file_size still applies per file"""
+        if not file_paths:
+            return []
+        
+        workers = min(workers or os.cpu_count() or 1, len(file_paths))
+        if workers <= 1:
+            return [self.parse_docx(path) for path in file_paths]
+        
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(self.parse_docx, file_paths, chunksize=4))
+        except Exception as e:
+            logger.warning(f"Parallel DOCX parsing failed, parsing sequentially: {e}")
+            return [self.parse_docx(path) for path in file_paths]
+    
+    def _parse_text_only(self, file_path: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill result with paragraph text only, streamed without building the python-docx tree"""
+        # Styles and alignment need the styles part, so they are not reported here
+        for para_text in _iter_body_paragraph_texts(file_path):
+            if not para_text or para_text.isspace():
+                continue
+            result['paragraph_texts'].append(para_text)
+            result['paragraph_styles'].append(None)
+            result['paragraph_alignments'].append(None)
+        
+        result['extracted_text'] = "\n".join(result['paragraph_texts']).strip()
+        result['metadata']['paragraphs'] = len(result['paragraph_texts'])
+        result['metadata']['total_characters'] = len(result['extracted_text'])
+        result['metadata']['total_words'] = len(result['extracted_text'].split())
+        
+        logger.info(f"Successfully parsed DOCX text: {file_path}, {result['metadata']['paragraphs']} paragraphs")
+        
+        return result
+    
     def extract_tables(self, file_path: str) -> Optional[List[Dict[str, Any]]]:
         """Extract all tables from DOCX document"""
         try:
-            result = self.parse_docx(file_path)
-            if not result or not result['success']:
-                return None
-            
-            return result['tables']
+            doc = self._open_document(file_path)
+            return [self._extract_table_data(table, table_idx) for table_idx, table in enumerate(doc.tables)]
             
         except Exception as e:
             logger.error(f"Error extracting tables from DOCX: {e}")
@@ -132,15 +413,16 @@ class DocxParser:
     def extract_headings(self, file_path: str) -> Optional[List[Dict[str, str]]]:
         """Extract headings and their hierarchy"""
         try:
-            doc = docx.Document(file_path)
+            doc = self._open_document(file_path)
             headings = []
             
             for para in doc.paragraphs:
-                if para.style and 'Heading' in para.style.name:
+                style = para.style
+                if style and 'Heading' in style.name:
                     headings.append({
                         'text': para.text,
-                        'level': para.style.name,
-                        'style': para.style.name
+                        'level': style.name,
+                        'style': style.name
                     })
             
             return headings
@@ -149,6 +431,17 @@ class DocxParser:
             logger.error(f"Error extracting headings from DOCX: {e}")
             return None
     
+    def clear_cache(self):
+        """Drop cached parsed documents"""
+        _load_document.cache_clear()
+    
+    def _open_document(self, file_path: str):
+        """Return the parsed document, reusing it while the file is unchanged"""
+        stat = os.stat(file_path)
+        if stat.st_size > self.max_file_size:
+            raise ValueError(f"DOCX file too large: {stat.st_size} bytes")
+        return _load_document(file_path, stat.st_mtime_ns, stat.st_size)
+    
     def _extract_table_data(self, table, table_idx: int) -> Dict[str, Any]:
         """Extract data from a table"""
         table_data = {
@@ -159,11 +452,21 @@ class DocxParser:
         }
         
         try:
-            for row_idx, row in enumerate(table.rows):
+            # Walk <w:tr>/<w:tc> directly; table.rows/row.cells rebuild the merged-cell
+            # layout on every access. Spans and vertical merges are resolved the same way.
+            column_text = {}
+            for tr in table._tbl.tr_lst:
                 row_data = []
-                for cell in row.cells:
-                    cell_text = cell.text.strip()
-                    row_data.append(cell_text)
+                grid_offset = tr.grid_before
+                for tc in tr.tc_lst:
+                    span = tc.grid_span
+                    if tc.vMerge == 'continue':
+                        cell_text = column_text.get(grid_offset, '')
+                    else:
+                        cell_text = "\n".join(p.text for p in tc.p_lst).strip()
+                        column_text[grid_offset] = cell_text
+                    row_data.extend([cell_text] * span)
+                    grid_offset += span
                 
                 table_data['rows'].append(row_data)
                 
@@ -185,82 +488,17 @@ class DocxParser:
     
     def _analyze_docx_content(self, text: str, styles_used: List[str]) -> Dict[str, Any]:
         """Analyze DOCX content to determine document type and characteristics"""
-        import re
-        
-        analysis = {
-            'document_type': 'unknown',
-            'structure_score': 0.0,
-            'content_type': 'unknown',
-            'key_sections': [],
-            'formal_level': 'unknown'
-        }
-        
-        text_lower = text.lower()
-        
-        # Determine document type based on content and structure
-        doc_type_indicators = {
-            'contract': ['kontrak', 'perjanjian', 'pasal', 'ayat', 'syarat dan ketentuan', 'pihak pertama', 'pihak kedua'],
-            'specification': ['spesifikasi', 'persyaratan', 'standar', 'mutu', 'kualitas', 'metode kerja'],
-            'report': ['laporan', 'executive summary', 'kesimpulan', 'rekomendasi', 'analisis'],
-            'proposal': ['proposal', 'penawaran', 'tender', 'lelang', 'bid'],
-            'manual': ['panduan', 'petunjuk', 'prosedur', 'langkah-langkah', 'cara'],
-            'correspondence': ['surat', 'memo', 'nota', 'undangan', 'pemberitahuan']
-        }
-        
-        max_score = 0
-        detected_type = 'unknown'
-        
-        for doc_type, indicators in doc_type_indicators.items():
-            score = sum(1 for indicator in indicators if indicator in text_lower)
-            if score > max_score:
-                max_score = score
-                detected_type = doc_type
-        
-        analysis['document_type'] = detected_type
-        
-        # Analyze structure based on styles used
-        structure_indicators = ['Heading', 'Title', 'Subtitle', 'List', 'Caption', 'Quote']
-        structure_score = sum(1 for style in styles_used if any(indicator in style for indicator in structure_indicators))
-        analysis['structure_score'] = min(structure_score / 5.0, 1.0)  # Normalize to 0-1
-        
-        # Determine formality level
-        formal_indicators = ['dengan hormat', 'yang bertanda tangan', 'demikian', 'terima kasih', 'hormat kami']
-        formal_count = sum(1 for indicator in formal_indicators if indicator in text_lower)
-        
-        if formal_count >= 2:
-            analysis['formal_level'] = 'formal'
-        elif formal_count >= 1:
-            analysis['formal_level'] = 'semi-formal'
-        else:
-            analysis['formal_level'] = 'informal'
-        
-        # Extract key sections based on common patterns
-        section_patterns = [
-            r'(?:^|\n)([A-Z][^.\n]{5,50})(?:\n|$)',  # Lines that might be section headers
-            r'(?:^|\n)(\d+\.?\s+[A-Z][^.\n]{5,50})(?:\n|$)',  # Numbered sections
-            r'(?:^|\n)([IVX]+\.?\s+[A-Z][^.\n]{5,50})(?:\n|$)'  # Roman numbered sections
-        ]
-        
-        key_sections = []
-        for pattern in section_patterns:
-            matches = re.findall(pattern, text, re.MULTILINE)
-            key_sections.extend(matches[:10])  # Limit to 10 sections
-        
-        analysis['key_sections'] = list(set(key_sections))[:10]
-        
-        return analysis
+        accumulator = DocxAnalysisAccumulator()
+        accumulator.feed(text)
+        return accumulator.finalize(styles_used)
     
     def _count_images(self, doc) -> int:
         """Count images in the document"""
         try:
-            image_count = 0
-            
-            # Count inline shapes (images)
-            for rel in doc.part.rels.values():
-                if "image" in rel.target_ref:
-                    image_count += 1
+            # Count distinct image targets; the same image may be referenced by several rels
+            targets = {rel.target_ref for rel in doc.part.rels.values() if "image" in rel.target_ref}
             
-            return image_count
+            return len(targets)
             
         except Exception as e:
             logger.debug(f"Error counting images: {e}")
@@ -268,14 +506,13 @@ class DocxParser:
     
     def _is_mostly_numeric(self, text: str) -> bool:
         """Check if text is mostly numeric"""
-        if not text.strip():
+        if not text or text.isspace():
             return False
         
-        import re
         # Remove common non-numeric characters in numbers
-        cleaned = re.sub(r'[.,\s%Rp-]', '', text)
+        cleaned = text.translate(_NUMERIC_STRIP)
         if not cleaned:
             return False
         
-        numeric_chars = sum(1 for char in cleaned if char.isdigit())
+        numeric_chars = sum(map(str.isdigit, cleaned))
         return numeric_chars / len(cleaned) > 0.5
@@ -1,18 +1,249 @@
 import PyPDF2
+import contextlib
 import io
+import mmap
 import os
-from typing import Dict, Any, Optional, List
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional, List, Iterator, Tuple
+from utils.columnar import RecordView
+from utils.keyword_matcher import KeywordMatcher
 from utils.logger import get_logger
 
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # Optional dependency, C-backed text extraction
+    pdfium = None
+
 logger = get_logger(__name__)
 
+# Optional NumPy/numba line scan for table detection, imported and compiled on first use by _import_table_stats()
+np = None
+_line_table_stats = None
+_table_stats_loaded = False
+
+# Files above this size are memory-mapped instead of read through a buffered file
+_MMAP_THRESHOLD = 10 * 1024 * 1024
+
+# PDFium must not be called from several threads at once, even for different documents
+_PDFIUM_LOCK = threading.Lock()
+
+# Monetary amounts
+_MONEY_PATTERNS = [re.compile(pattern) for pattern in (
+    r'(?:Rp\.?\s*)?(\d{1,3}(?:[.,]\d{3})*(?:[.,]\d{2})?)',
+    r'(\d+(?:\.\d+)?)\s*(?:juta|miliar|ribu)',
+)]
+
+# Other important numbers
+_NUMBER_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(\d+(?:\.\d+)?)\s*(?:m²|m³|m2|m3)',  # Areas and volumes
+    r'(\d+(?:\.\d+)?)\s*(?:meter|m)\b',    # Lengths
+    r'(\d+(?:\.\d+)?)\s*%',                # Percentages
+    r'(\d+(?:\.\d+)?)\s*(?:kg|ton|lt|liter)', # Quantities
+)]
+
+# Document type patterns
+DOCUMENT_PATTERNS = {
+    'rab': ['rencana anggaran biaya', 'rab', 'bill of quantity', 'boq', 'daftar kuantitas'],
+    'contract': ['kontrak', 'perjanjian', 'agreement', 'syarat umum', 'syarat khusus'],
+    'specification': ['spesifikasi', 'specification', 'spec', 'mutu', 'kualitas'],
+    'drawing': ['gambar kerja', 'drawing', 'denah', 'potongan', 'detail', 'tampak'],
+    'report': ['laporan', 'report', 'progress', 'kemajuan', 'evaluasi'],
+    'permit': ['izin', 'permit', 'imb', 'siup', 'surat izin']
+}
+
+_DOCUMENT_MATCHER = KeywordMatcher(DOCUMENT_PATTERNS)
+
+_TABLE_NUMBER = re.compile(r'\d+[.,]?\d*')
+_MULTISPACE = re.compile(r'\s{2,}')
+
+def _scan_table_lines(buf):
+    """Per-line _TABLE_NUMBER match counts and separator flags for an ASCII text buffer"""
+    n = buf.shape[0]
+    line_count = 1
+    for i in range(n):
+        if buf[i] == 10:
+            line_count += 1
+    
+    number_counts = np.zeros(line_count, np.int64)
+    has_separators = np.zeros(line_count, np.bool_)
+    line = 0
+    start = 0
+    for end in range(n + 1):
+        if end < n and buf[end] != 10:
+            continue
+        
+        # Bounds of the line after str.strip()
+        lo = start
+        hi = end
+        while lo < hi and (buf[lo] == 32 or 9 <= buf[lo] <= 13 or 28 <= buf[lo] <= 31):
+            lo += 1
+        while hi > lo and (buf[hi - 1] == 32 or 9 <= buf[hi - 1] <= 13 or 28 <= buf[hi - 1] <= 31):
+            hi -= 1
+        
+        count = 0
+        separator = False
+        i = lo
+        while i < hi:
+            c = buf[i]
+            if 48 <= c <= 57:
+                count += 1
+                while i < hi and 48 <= buf[i] <= 57:
+                    i += 1
+                if i < hi and (buf[i] == 46 or buf[i] == 44):
+                    i += 1
+                    while i < hi and 48 <= buf[i] <= 57:
+                        i += 1
+                continue
+            if c == 124 or c == 9 or (c == 32 and i + 1 < hi and buf[i + 1] == 32):
+                separator = True
+            i += 1
+        
+        number_counts[line] = count
+        has_separators[line] = separator
+        line += 1
+        start = end + 1
+    
+    return number_counts, has_separators
+
+def _import_table_stats() -> None:
+    """Import NumPy and numba and compile the table line scan on first use"""
+    global np, _line_table_stats, _table_stats_loaded
+    if _table_stats_loaded:
+        return
+    
+    try:
+        import numpy as np
+        from numba import njit
+    except ImportError:  # Optional dependency, compiled line scan for table detection
+        pass
+    else:
+        _line_table_stats = njit(cache=True)(_scan_table_lines)
+    
+    _table_stats_loaded = True
+
+def _collect_matches(found: List[Dict[str, None]], patterns: List[re.Pattern], text: str, cap: int):
+    """Add each pattern's next distinct group(1) values from text, up to `cap` per pattern"""
+    seen = set()
+    for pattern, pattern_found in zip(patterns, found):
+        # Once earlier patterns hold `cap` distinct values, later ones can't reach the result
+        if len(seen) >= cap:
+            return
+        if len(pattern_found) < cap:
+            for match in pattern.finditer(text):
+                pattern_found[match.group(1)] = None
+                if len(pattern_found) >= cap:
+                    break
+        seen.update(pattern_found)
+
+def _merge_matches(found: List[Dict[str, None]], cap: int) -> List[str]:
+    """First `cap` distinct values across patterns, in pattern order"""
+    merged = {}
+    for pattern_found in found:
+        for value in pattern_found:
+            merged[value] = None
+            if len(merged) >= cap:
+                return list(merged)
+    return list(merged)
+
+
+class PdfAnalysisAccumulator:
+    """Incremental PDF content analysis, fed page by page"""
+    
+    def __init__(self):
+        self._hits = {doc_type: set() for doc_type in DOCUMENT_PATTERNS}
+        self._money = [{} for _ in _MONEY_PATTERNS]
+        self._numbers = [{} for _ in _NUMBER_PATTERNS]
+    
+    def feed(self, chunk: str):
+        """Add the next chunk of text, in the order it appears in extracted_text"""
+        for doc_type, found in _DOCUMENT_MATCHER.find(chunk.lower()).items():
+            self._hits[doc_type].update(found)
+        
+        _collect_matches(self._money, _MONEY_PATTERNS, chunk, 20)
+        _collect_matches(self._numbers, _NUMBER_PATTERNS, chunk, 20)
+    
+    def finalize(self) -> Dict[str, Any]:
+        """Return the analysis for everything fed so far"""
+        analysis = {
+            'document_type': 'unknown',
+            'keywords_found': [],
+            'numbers_found': [],
+            'currency_amounts': [],
+            'confidence_score': 0.0
+        }
+        
+        # Check document type; the winner's keyword list is built once
+        best_type = max(DOCUMENT_PATTERNS, key=lambda doc_type: len(self._hits[doc_type]))
+        max_matches = len(self._hits[best_type])
+        
+        if max_matches:
+            analysis['document_type'] = best_type
+            analysis['keywords_found'] = [kw for kw in DOCUMENT_PATTERNS[best_type] if kw in self._hits[best_type]]
+        
+        analysis['confidence_score'] = min(max_matches / 3.0, 1.0)  # Normalize to 0-1
+        
+        # Monetary amounts and other important numbers, without duplicates and limited to 20
+        analysis['currency_amounts'] = _merge_matches(self._money, 20)
+        analysis['numbers_found'] = _merge_matches(self._numbers, 20)
+        
+        return analysis
+
+
+def _page_block(page_number: int, page_text: str) -> str:
+    """Format one page of text the way it appears in extracted_text"""
+    return f"\n--- Page {page_number} ---\n{page_text}\n"
+
+@contextlib.contextmanager
+def _open_pdf_stream(file_path: str):
+    """Open a PDF for PdfReader, memory-mapping large files so the OS pages in what is read"""
+    with open(file_path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size <= _MMAP_THRESHOLD:
+            yield file
+            return
+        
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+def _open_pdfium(file_path: str):
+    """Open the document with PDFium when it is installed, or None to extract text with PyPDF2"""
+    if pdfium is None:
+        return None
+    try:
+        with _PDFIUM_LOCK:
+            return pdfium.PdfDocument(file_path)
+    except (pdfium.PdfiumError, OSError) as e:
+        logger.warning(f"PDFium could not open {file_path}, using PyPDF2 text extraction: {e}")
+        return None
+
+def _close_pdfium(pdfium_doc):
+    """Release a document opened by _open_pdfium"""
+    if pdfium_doc is not None:
+        with _PDFIUM_LOCK:
+            pdfium_doc.close()
+
+def _page_text(page, pdfium_doc, page_index: int) -> str:
+    """Extract one page's text, through PDFium when the document was opened with it"""
+    if pdfium_doc is None:
+        return page.extract_text()
+    
+    with _PDFIUM_LOCK:
+        pdfium_page = pdfium_doc[page_index]
+        textpage = pdfium_page.get_textpage()
+        try:
+            return textpage.get_text_range().replace('\r\n', '\n')
+        finally:
+            textpage.close()
+            pdfium_page.close()
+
 class PDFParser:
     """Parser for PDF documents"""
     
     def __init__(self):
         self.max_file_size = 50 * 1024 * 1024  # 50MB
         
-    def parse_pdf(self, file_path: str) -> Optional[Dict[str, Any]]:
+    def parse_pdf(self, file_path: str, include_images: bool = False) -> Optional[Dict[str, Any]]:
         """Parse PDF file and extract text and metadata"""
         try:
             if not os.path.exists(file_path):
@@ -33,11 +264,21 @@ class PDFParser:
                     'size': file_size,
                     'file_path': file_path
                 },
-                'pages_content': [],
+                # Per-page data is kept column-wise; pages_content is a list-of-dicts view over it
+                'page_numbers': [],
+                'page_texts': [],
+                'page_char_counts': [],
                 'success': True
             }
+            result['pages_content'] = RecordView({
+                'page_number': result['page_numbers'],
+                'text': result['page_texts'],
+                'char_count': result['page_char_counts']
+            })
+            if include_images:
+                result['images'] = []
             
-            with open(file_path, 'rb') as file:
+            with _open_pdf_stream(file_path) as file:
                 pdf_reader = PyPDF2.PdfReader(file)
                 
                 # Get metadata
@@ -55,34 +296,41 @@ class PDFParser:
                     })
                 
                 # Extract text from each page
-                full_text = ""
-                for page_num, page in enumerate(pdf_reader.pages):
-                    try:
-                        page_text = page.extract_text()
-                        if page_text:
-                            page_text = page_text.strip()
-                            full_text += f"\n--- Page {page_num + 1} ---\n{page_text}\n"
-                            
-                            result['pages_content'].append({
-                                'page_number': page_num + 1,
-                                'text': page_text,
-                                'char_count': len(page_text)
-                            })
-                    except Exception as e:
-                        logger.warning(f"Error extracting text from page {page_num + 1}: {e}")
-                        result['pages_content'].append({
-                            'page_number': page_num + 1,
-                            'text': f"[Error extracting page: {str(e)}]",
-                            'char_count': 0
-                        })
+                chunks = []
+                accumulator = PdfAnalysisAccumulator()
+                pdfium_doc = _open_pdfium(file_path)
+                try:
+                    for page_num, page in enumerate(pdf_reader.pages):
+                        try:
+                            page_text = _page_text(page, pdfium_doc, page_num)
+                            if page_text:
+                                page_text = page_text.strip()
+                                chunks.append(_page_block(page_num + 1, page_text))
+                                accumulator.feed(chunks[-1])
+                                
+                                result['page_numbers'].append(page_num + 1)
+                                result['page_texts'].append(page_text)
+                                result['page_char_counts'].append(len(page_text))
+                        except Exception as e:
+                            logger.warning(f"Error extracting text from page {page_num + 1}: {e}")
+                            result['page_numbers'].append(page_num + 1)
+                            result['page_texts'].append(f"[Error extracting page: {str(e)}]")
+                            result['page_char_counts'].append(0)
+                        
+                        if include_images:
+                            try:
+                                result['images'].extend(self._page_images_info(page, page_num))
+                            except Exception as e:
+                                logger.warning(f"Error reading images on page {page_num + 1}: {e}")
+                finally:
+                    _close_pdfium(pdfium_doc)
                 
-                result['extracted_text'] = full_text.strip()
+                result['extracted_text'] = "".join(chunks).strip()
                 result['metadata']['total_characters'] = len(result['extracted_text'])
                 result['metadata']['total_words'] = len(result['extracted_text'].split())
                 
-                # Analyze content type
-                content_analysis = self._analyze_pdf_content(result['extracted_text'])
-                result['content_analysis'] = content_analysis
+                # Analyze content type; each page was fed to the accumulator as it was extracted
+                result['content_analysis'] = accumulator.finalize()
                 
                 logger.info(f"Successfully parsed PDF: {file_path}, {result['metadata']['pages']} pages, {result['metadata']['total_characters']} characters")
                 
@@ -97,17 +345,72 @@ class PDFParser:
                 'success': False
             }
     
+    def parse_pdf_full(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """Parse text, metadata and image info from a single PDF read"""
+        return self.parse_pdf(file_path, include_images=True)
+    
+    def sniff(self, file_path: str) -> Dict[str, Any]:
+        """Identify a PDF from its header, trailer and page tree root without decoding pages"""
+        info = {'is_pdf': False, 'version': None, 'has_eof': False, 'page_count': None}
+        try:
+            with _open_pdf_stream(file_path) as file:
+                header = file.read(8)
+                info['is_pdf'] = header.startswith(b'%PDF-')
+                if not info['is_pdf']:
+                    return info
+                info['version'] = header[5:8].decode('ascii', 'replace')
+                
+                # %%EOF sits in the last few bytes, allowing for trailing whitespace or junk
+                file.seek(max(0, os.path.getsize(file_path) - 1024))
+                info['has_eof'] = b'%%EOF' in file.read()
+                
+                file.seek(0)
+                pdf_reader = PyPDF2.PdfReader(file, strict=False)
+                info['page_count'] = int(pdf_reader.trailer['/Root']['/Pages']['/Count'])
+        except Exception as e:
+            logger.debug(f"Could not sniff PDF {file_path}: {e}")
+        
+        return info
+    
+    def parse_many(self, file_paths: List[str], workers: Optional[int] = None) -> List[Optional[Dict[str, Any]]]:
+        """Parse many PDF files in parallel worker processes; max_file_size still applies per file"""
+        if not file_paths:
+            return []
+        
+        workers = min(workers or os.cpu_count() or 1, len(file_paths))
+        if workers <= 1:
+            return [self.parse_pdf(path) for path in file_paths]
+        
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(self.parse_pdf, file_paths, chunksize=4))
+        except Exception as e:
+            logger.warning(f"Parallel PDF parsing failed, parsing sequentially: {e}")
+            return [self.parse_pdf(path) for path in file_paths]
+    
     def extract_tables(self, file_path: str) -> Optional[List[List[str]]]:
         """Extract tables from PDF (basic implementation)"""
         try:
             # This is a basic implementation
             # For more advanced table extraction, consider using tabula-py or camelot
             
-            result = self.parse_pdf(file_path)
-            if not result or not result['success']:
+            if not os.path.exists(file_path):
+                logger.error(f"PDF file not found: {file_path}")
+                return None
+            
+            # Check file size
+            file_size = os.path.getsize(file_path)
+            if file_size > self.max_file_size:
+                logger.error(f"PDF file too large: {file_size} bytes")
                 return None
             
-            text = result['extracted_text']
+            # Only the page text is needed, skip the full parse and analysis.
+            # Columns are split on runs of spaces, so keep PyPDF2's spacing.
+            text = "".join(
+                _page_block(page_number, page_text.strip())
+                for page_number, page_text in self.iter_pages(file_path, keep_spacing=True)
+                if page_text
+            ).strip()
             tables = self._extract_tables_from_text(text)
             
             return tables
@@ -116,28 +419,33 @@ class PDFParser:
             logger.error(f"Error extracting tables from PDF: {e}")
             return None
     
+    def iter_pages(self, file_path: str, keep_spacing: bool = False) -> Iterator[Tuple[int, str]]:
+        """Yield (page_number, text) for each page without keeping the whole document text"""
+        with _open_pdf_stream(file_path) as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            # PDFium collapses the runs of spaces between columns; PyPDF2 keeps them
+            pdfium_doc = None if keep_spacing else _open_pdfium(file_path)
+            try:
+                for page_num, page in enumerate(pdf_reader.pages):
+                    try:
+                        page_text = _page_text(page, pdfium_doc, page_num) or ""
+                    except Exception as e:
+                        logger.warning(f"Error extracting text from page {page_num + 1}: {e}")
+                        page_text = ""
+                    yield page_num + 1, page_text
+            finally:
+                _close_pdfium(pdfium_doc)
+    
     def extract_images_info(self, file_path: str) -> Optional[List[Dict[str, Any]]]:
         """Extract information about images in PDF"""
         try:
             images_info = []
             
-            with open(file_path, 'rb') as file:
+            with _open_pdf_stream(file_path) as file:
                 pdf_reader = PyPDF2.PdfReader(file)
                 
                 for page_num, page in enumerate(pdf_reader.pages):
-                    if '/XObject' in page['/Resources']:
-                        xObject = page['/Resources']['/XObject'].get_object()
-                        
-                        for obj in xObject:
-                            if xObject[obj]['/Subtype'] == '/Image':
-                                images_info.append({
-                                    'page': page_num + 1,
-                                    'name': obj,
-                                    'width': xObject[obj].get('/Width', 'unknown'),
-                                    'height': xObject[obj].get('/Height', 'unknown'),
-                                    'bits_per_component': xObject[obj].get('/BitsPerComponent', 'unknown'),
-                                    'color_space': str(xObject[obj].get('/ColorSpace', 'unknown'))
-                                })
+                    images_info.extend(self._page_images_info(page, page_num))
             
             return images_info
             
@@ -145,83 +453,47 @@ class PDFParser:
             logger.error(f"Error extracting image info from PDF: {e}")
             return None
     
+    def _page_images_info(self, page, page_num: int) -> List[Dict[str, Any]]:
+        """Describe the image XObjects of a single page"""
+        images_info = []
+        if '/XObject' in page['/Resources']:
+            xObject = page['/Resources']['/XObject'].get_object()
+            
+            for obj in xObject:
+                if xObject[obj]['/Subtype'] == '/Image':
+                    images_info.append({
+                        'page': page_num + 1,
+                        'name': obj,
+                        'width': xObject[obj].get('/Width', 'unknown'),
+                        'height': xObject[obj].get('/Height', 'unknown'),
+                        'bits_per_component': xObject[obj].get('/BitsPerComponent', 'unknown'),
+                        'color_space': str(xObject[obj].get('/ColorSpace', 'unknown'))
+                    })
+        
+        return images_info
+    
     def _analyze_pdf_content(self, text: str) -> Dict[str, Any]:
         """Analyze PDF content to determine document type and extract key information"""
-        import re
-        
-        analysis = {
-            'document_type': 'unknown',
-            'keywords_found': [],
-            'numbers_found': [],
-            'currency_amounts': [],
-            'confidence_score': 0.0
-        }
-        
-        text_lower = text.lower()
-        
-        # Define document type patterns
-        document_patterns = {
-            'rab': ['rencana anggaran biaya', 'rab', 'bill of quantity', 'boq', 'daftar kuantitas'],
-            'contract': ['kontrak', 'perjanjian', 'agreement', 'syarat umum', 'syarat khusus'],
-            'specification': ['spesifikasi', 'specification', 'spec', 'mutu', 'kualitas'],
-            'drawing': ['gambar kerja', 'drawing', 'denah', 'potongan', 'detail', 'tampak'],
-            'report': ['laporan', 'report', 'progress', 'kemajuan', 'evaluasi'],
-            'permit': ['izin', 'permit', 'imb', 'siup', 'surat izin']
-        }
-        
-        # Check document type
-        max_matches = 0
-        detected_type = 'unknown'
-        
-        for doc_type, keywords in document_patterns.items():
-            matches = sum(1 for keyword in keywords if keyword in text_lower)
-            if matches > max_matches:
-                max_matches = matches
-                detected_type = doc_type
-                analysis['keywords_found'] = [kw for kw in keywords if kw in text_lower]
-        
-        analysis['document_type'] = detected_type
-        analysis['confidence_score'] = min(max_matches / 3.0, 1.0)  # Normalize to 0-1
-        
-        # Extract monetary amounts
-        money_patterns = [
-            r'(?:Rp\.?\s*)?(\d{1,3}(?:[.,]\d{3})*(?:[.,]\d{2})?)',
-            r'(\d+(?:\.\d+)?)\s*(?:juta|miliar|ribu)',
-        ]
-        
-        for pattern in money_patterns:
-            matches = re.findall(pattern, text)
-            analysis['currency_amounts'].extend(matches)
-        
-        # Extract other important numbers
-        number_patterns = [
-            r'(\d+(?:\.\d+)?)\s*(?:m²|m³|m2|m3)',  # Areas and volumes
-            r'(\d+(?:\.\d+)?)\s*(?:meter|m)\b',    # Lengths
-            r'(\d+(?:\.\d+)?)\s*%',                # Percentages
-            r'(\d+(?:\.\d+)?)\s*(?:kg|ton|lt|liter)', # Quantities
-        ]
-        
-        for pattern in number_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            analysis['numbers_found'].extend(matches)
-        
-        # Remove duplicates and limit results
-        analysis['currency_amounts'] = list(set(analysis['currency_amounts']))[:20]
-        analysis['numbers_found'] = list(set(analysis['numbers_found']))[:20]
-        
-        return analysis
+        accumulator = PdfAnalysisAccumulator()
+        accumulator.feed(text)
+        return accumulator.finalize()
     
     def _extract_tables_from_text(self, text: str) -> List[List[str]]:
         """Basic table extraction from text"""
-        import re
-        
         tables = []
         lines = text.split('\n')
         
+        # Compiled per-line statistics; _TABLE_NUMBER's \d also matches non-ASCII digits, so ASCII text only
+        line_stats = None
+        _import_table_stats()
+        if _line_table_stats is not None and text.isascii():
+            number_counts, separator_flags = _line_table_stats(np.frombuffer(text.encode('ascii'), dtype=np.uint8))
+            line_stats = (number_counts.tolist(), separator_flags.tolist())
+        
         current_table = []
         in_table = False
         
-        for line in lines:
+        for line_idx, line in enumerate(lines):
             line = line.strip()
             if not line:
                 if in_table and current_table:
@@ -230,11 +502,15 @@ class PDFParser:
                     in_table = False
                 continue
             
-            # Simple heuristic: if line has multiple numbers or currency, it might be a table row
-            number_count = len(re.findall(r'\d+[.,]?\d*', line))
-            
-            # Look for common table separators
-            has_separators = any(sep in line for sep in ['|', '\t', '  '])
+            if line_stats is not None:
+                number_count = line_stats[0][line_idx]
+                has_separators = line_stats[1][line_idx]
+            else:
+                # Simple heuristic: if line has multiple numbers or currency, it might be a table row
+                number_count = len(_TABLE_NUMBER.findall(line))
+                
+                # Look for common table separators
+                has_separators = any(sep in line for sep in ['|', '\t', '  '])
             
             if number_count >= 2 or has_separators:
                 in_table = True
@@ -245,7 +521,7 @@ class PDFParser:
                     row = [cell.strip() for cell in line.split('\t') if cell.strip()]
                 else:
                     # Split by multiple spaces
-                    row = [cell.strip() for cell in re.split(r'\s{2,}', line) if cell.strip()]
+                    row = [cell.strip() for cell in _MULTISPACE.split(line) if cell.strip()]
                 
                 if row:
                     current_table.append(row)
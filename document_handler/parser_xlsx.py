@@ -1,10 +1,245 @@
 import openpyxl
+import heapq
 import os
-from typing import Dict, Any, Optional, List, Union
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time
+from itertools import chain
+from typing import Dict, Any, Iterable, Iterator, Optional, List, Union
 from utils.logger import get_logger
+from utils.columnar import SparseRows
+from utils.keyword_matcher import KeywordMatcher
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency, vectorized classification of numeric cells
+    np = None
+
+try:
+    from numba import njit
+except ImportError:  # Optional dependency, compiled classification of numeric cells
+    njit = None
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # Optional dependency, Rust-backed sheet reader used before openpyxl
+    CalamineWorkbook = None
 
 logger = get_logger(__name__)
 
+# Multi-sheet workbooks at least this large extract their sheets in parallel worker processes
+_PARALLEL_SHEETS_MIN_SIZE = 2 * 1024 * 1024
+
+# Integral floats from calamine below this magnitude are read back as int, like openpyxl does
+# for numbers stored without a decimal point or exponent
+_CALAMINE_INT_LIMIT = 1e15
+
+# Cell patterns for data type analysis
+_MONEY_RE = re.compile(r'(?:rp|rupiah|\$|usd)', re.I)
+_NUM_RE = re.compile(r'\d+[.,]?\d*')
+
+# Patterns that indicate financial data in a row
+FINANCIAL_INDICATORS = ['total', 'subtotal', 'cost', 'price', 'amount', 'biaya', 'harga', 'jumlah', 'rp']
+
+# Document type indicators
+TYPE_INDICATORS = {
+    'budget': ['budget', 'anggaran', 'rab', 'cost', 'biaya', 'total', 'subtotal'],
+    'inventory': ['stock', 'inventory', 'item', 'quantity', 'qty', 'material'],
+    'financial': ['income', 'expense', 'profit', 'loss', 'revenue', 'pendapatan'],
+    'schedule': ['schedule', 'timeline', 'jadwal', 'date', 'week', 'month'],
+    'analysis': ['analysis', 'trend', 'comparison', 'variance', 'ratio'],
+    'report': ['report', 'summary', 'dashboard', 'kpi', 'metric']
+}
+
+# Common sheet purposes
+PURPOSE_PATTERNS = {
+    'summary': ['summary', 'ringkasan', 'total', 'overview'],
+    'data': ['data', 'raw', 'input', 'master'],
+    'calculation': ['calc', 'perhitungan', 'formula', 'analysis'],
+    'chart': ['chart', 'graph', 'grafik', 'visualization'],
+    'report': ['report', 'laporan', 'output', 'result'],
+    'budget': ['budget', 'anggaran', 'cost', 'biaya'],
+    'schedule': ['schedule', 'jadwal', 'timeline', 'planning']
+}
+
+# Each indicator set is matched in a single pass over the text
+_FINANCIAL_MATCHER = KeywordMatcher({'financial': FINANCIAL_INDICATORS})
+_SHEET_MATCHER = KeywordMatcher({
+    **{('type', doc_type): indicators for doc_type, indicators in TYPE_INDICATORS.items()},
+    **{('purpose', purpose): patterns for purpose, patterns in PURPOSE_PATTERNS.items()}
+})
+if np is not None and njit is not None:
+    @njit(cache=True)
+    def _classify_numbers(values, large_cap, percentage_cap):
+        """Indices of the first large numbers and percentages, stopping once both caps are reached"""
+        large = np.empty(large_cap, np.int64)
+        percentages = np.empty(percentage_cap, np.int64)
+        large_count = 0
+        percentage_count = 0
+        for i in range(values.shape[0]):
+            if large_count == large_cap and percentage_count == percentage_cap:
+                break
+            
+            value = values[i]
+            if large_count < large_cap and value > 100000:
+                large[large_count] = i
+                large_count += 1
+            
+            # Values between 0 and 1, or non-integers up to 100
+            if percentage_count < percentage_cap and value >= 0:
+                if value <= 1 or (value <= 100 and value != np.trunc(value)):
+                    percentages[percentage_count] = i
+                    percentage_count += 1
+        return large[:large_count], percentages[:percentage_count]
+else:
+    _classify_numbers = None
+
+
+class SheetDataAccumulator:
+    """Incremental data type analysis of a sheet, fed cell by cell in row order"""
+    
+    def __init__(self):
+        self._analysis = {
+            'total_cells_with_data': 0,
+            'numeric_cells': 0,
+            'text_cells': 0,
+            'date_cells': 0,
+            'formula_cells': 0,
+            'monetary_values': [],
+            'large_numbers': [],
+            'percentages': []
+        }
+        # With NumPy, numeric cells are classified in bulk by finalize(); text percentages
+        # remember how many numbers preceded them so the combined list keeps cell order
+        self._numbers = [] if np is not None else None
+        self._text_percentages = []
+    
+    def feed(self, cell: Any):
+        """Add one non-empty cell"""
+        analysis = self._analysis
+        analysis['total_cells_with_data'] += 1
+        
+        # Lists are limited to prevent memory issues
+        if isinstance(cell, (int, float)):
+            analysis['numeric_cells'] += 1
+            
+            if self._numbers is not None:
+                self._numbers.append(cell)
+                return
+            
+            # Check for monetary values (large numbers)
+            if cell > 100000 and len(analysis['large_numbers']) < 50:  # Assuming values > 100k might be monetary
+                analysis['large_numbers'].append(float(cell))
+            
+            # Check for percentages (values between 0 and 1, or 0 and 100)
+            if len(analysis['percentages']) < 20:
+                if 0 <= cell <= 1:
+                    analysis['percentages'].append(float(cell))
+                elif 0 <= cell <= 100 and cell != int(cell):
+                    analysis['percentages'].append(float(cell))
+        
+        elif isinstance(cell, datetime):
+            analysis['date_cells'] += 1
+        
+        elif isinstance(cell, str):
+            analysis['text_cells'] += 1
+            
+            # Look for monetary and percentage indicators; numbers are extracted once for both
+            wants_money = len(analysis['monetary_values']) < 50 and _MONEY_RE.search(cell) is not None
+            wants_percent = '%' in cell and len(analysis['percentages']) + len(self._text_percentages) < 20
+            if not (wants_money or wants_percent):
+                return
+            
+            # The pattern only matches digit runs, so every match converts cleanly
+            numbers = [float(num_str.replace(',', '')) for num_str in _NUM_RE.findall(cell)]
+            
+            if wants_money:
+                for num in numbers:
+                    if num > 1000 and len(analysis['monetary_values']) < 50:
+                        analysis['monetary_values'].append(num)
+            
+            if wants_percent:
+                if self._numbers is None:
+                    for num in numbers:
+                        if len(analysis['percentages']) < 20:
+                            analysis['percentages'].append(num)
+                else:
+                    position = len(self._numbers)
+                    for num in numbers:
+                        if len(self._text_percentages) < 20:
+                            self._text_percentages.append((position, num))
+    
+    def finalize(self) -> Dict[str, Any]:
+        """Return the analysis for every cell fed so far"""
+        analysis = dict(self._analysis)
+        if not self._numbers and not self._text_percentages:
+            return analysis
+        
+        values = np.asarray(self._numbers, dtype=np.float64)
+        if _classify_numbers is not None:
+            large_positions, positions = _classify_numbers(values, 50, 20)
+            analysis['large_numbers'] = values[large_positions].tolist()
+        else:
+            analysis['large_numbers'] = values[values > 100000][:50].tolist()
+            
+            # Values between 0 and 1, or non-integers up to 100
+            with np.errstate(invalid='ignore'):
+                is_percentage = (values >= 0) & ((values <= 1) | ((values <= 100) & (values != np.trunc(values))))
+            positions = np.flatnonzero(is_percentage)[:20]
+        
+        # Merge with the text percentages; a text value at position p follows the first p numbers
+        merged = [(position, 1, value) for position, value in zip(positions.tolist(), values[positions].tolist())]
+        merged.extend((position, 0, value) for position, value in self._text_percentages)
+        merged.sort(key=lambda entry: entry[:2])
+        analysis['percentages'] = [value for _, _, value in merged[:20]]
+        
+        return analysis
+
+
+def _extract_sheet_in_worker(file_path: str, sheet_name: str, max_rows_per_sheet: int) -> Dict[str, Any]:
+    """Open the workbook in a worker process and extract a single sheet"""
+    parser = XlsxParser()
+    parser.max_rows_per_sheet = max_rows_per_sheet
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        return parser._extract_sheet_data(workbook[sheet_name].iter_rows(values_only=True), sheet_name)
+    finally:
+        workbook.close()
+
+def _prefetch_file(file_path: str):
+    """Ask the kernel to start reading the whole file in the background"""
+    # The zip reader seeks between members; with the file already on its way into the
+    # page cache those reads overlap with parsing instead of blocking one by one
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        logger.debug(f"Could not prefetch {file_path}: {e}")
+
+def _calamine_rows(sheet) -> Iterator[tuple]:
+    """Rows of a calamine sheet, with cell values as openpyxl's read-only mode returns them"""
+    # calamine starts rows at the first used column; openpyxl starts them at column A
+    leading = (None,) * sheet.start[1] if sheet.start else ()
+    for row in sheet.iter_rows():
+        values = []
+        for value in row:
+            if value == '' and isinstance(value, str):
+                value = None  # Empty cell
+            elif isinstance(value, float) and value.is_integer() and abs(value) < _CALAMINE_INT_LIMIT:
+                value = int(value)
+            elif isinstance(value, date) and not isinstance(value, datetime):
+                value = datetime.combine(value, time())
+            values.append(value)
+        yield leading + tuple(values)
+
+
 class XlsxParser:
     """Parser for Excel XLSX/XLS files"""
     
@@ -12,6 +247,11 @@ class XlsxParser:
         self.max_file_size = 50 * 1024 * 1024  # 50MB
         self.max_rows_per_sheet = 1000  # Limit rows to prevent memory issues
         
+        # Extracted sheets per (path, mtime, size, row limit), shared by all public methods
+        self._sheet_cache = OrderedDict()
+        self._sheet_cache_size = 8
+        self._sheet_cache_lock = threading.Lock()
+        
     def parse_xlsx(self, file_path: str) -> Optional[Dict[str, Any]]:
         """Parse XLSX file and extract data and metadata"""
         try:
@@ -25,7 +265,7 @@ class XlsxParser:
                 logger.error(f"Excel file too large: {file_size} bytes")
                 return None
             
-            workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+            sheets = self._read_sheets(file_path)
             
             result = {
                 'type': 'xlsx',
@@ -34,7 +274,7 @@ class XlsxParser:
                     'size': file_size,
                     'file_path': file_path,
                     'sheets': {},
-                    'total_sheets': len(workbook.sheetnames)
+                    'total_sheets': len(sheets)
                 },
                 'sheets': {},
                 'summary': {},
@@ -42,12 +282,11 @@ class XlsxParser:
             }
             
             # Extract data from each sheet
-            all_text = ""
+            text_parts = []
             total_rows = 0
             total_cells = 0
             
-            for sheet_name in workbook.sheetnames:
-                sheet_data = self._extract_sheet_data(workbook[sheet_name], sheet_name)
+            for sheet_name, sheet_data in sheets.items():
                 result['sheets'][sheet_name] = sheet_data
                 
                 # Update metadata
@@ -61,25 +300,30 @@ class XlsxParser:
                 total_cells += sheet_data['cell_count']
                 
                 # Add sheet data to extracted text
-                all_text += f"\n--- Sheet: {sheet_name} ---\n"
-                for row in sheet_data['data'][:50]:  # Limit to first 50 rows for text
-                    row_text = " | ".join(str(cell) for cell in row if cell is not None)
+                text_parts.append(f"\n--- Sheet: {sheet_name} ---\n")
+                data = sheet_data['data']
+                for row_idx in range(min(len(data), 50)):  # Limit to first 50 rows for text
+                    row_text = " | ".join([str(cell) for cell in data.row_values(row_idx)])
                     if row_text.strip():
-                        all_text += row_text + "\n"
+                        text_parts.append(row_text + "\n")
             
-            result['extracted_text'] = all_text.strip()
+            result['extracted_text'] = "".join(text_parts).strip()
             result['metadata']['total_rows'] = total_rows
             result['metadata']['total_cells'] = total_cells
             
+            # Classify each sheet once for both the summary and the content analysis
+            classifications = {
+                sheet_name: self._classify_sheet(sheet_name, sheet_data.get('data', []))
+                for sheet_name, sheet_data in result['sheets'].items()
+            }
+            
             # Create summary
-            result['summary'] = self._create_workbook_summary(result['sheets'])
+            result['summary'] = self._create_workbook_summary(result['sheets'], classifications)
             
             # Analyze content
-            content_analysis = self._analyze_excel_content(result['sheets'])
+            content_analysis = self._analyze_excel_content(result['sheets'], classifications)
             result['content_analysis'] = content_analysis
             
-            workbook.close()
-            
             logger.info(f"Successfully parsed Excel: {file_path}, {result['metadata']['total_sheets']} sheets, {total_rows} rows")
             
             return result
@@ -96,24 +340,20 @@ class XlsxParser:
     def extract_numerical_data(self, file_path: str) -> Optional[Dict[str, List[Dict[str, Any]]]]:
         """Extract numerical data from Excel file"""
         try:
-            result = self.parse_xlsx(file_path)
-            if not result or not result['success']:
-                return None
-            
+            sheets = self._read_sheets(file_path)
             numerical_data = {}
             
-            for sheet_name, sheet_data in result['sheets'].items():
+            for sheet_name, sheet_data in sheets.items():
                 numerical_data[sheet_name] = []
                 
-                for row_idx, row in enumerate(sheet_data['data']):
-                    for col_idx, cell in enumerate(row):
-                        if isinstance(cell, (int, float)) and cell != 0:
-                            numerical_data[sheet_name].append({
-                                'row': row_idx + 1,
-                                'column': col_idx + 1,
-                                'value': cell,
-                                'formatted': self._format_number(cell)
-                            })
+                for row_idx, col_idx, cell in sheet_data['data'].cells():
+                    if isinstance(cell, (int, float)) and cell != 0:
+                        numerical_data[sheet_name].append({
+                            'row': row_idx + 1,
+                            'column': col_idx + 1,
+                            'value': cell,
+                            'formatted': self._format_number(cell)
+                        })
             
             return numerical_data
             
@@ -124,22 +364,22 @@ class XlsxParser:
     def find_financial_tables(self, file_path: str) -> Optional[List[Dict[str, Any]]]:
         """Find tables that look like financial/cost data"""
         try:
-            result = self.parse_xlsx(file_path)
-            if not result or not result['success']:
-                return None
-            
+            sheets = self._read_sheets(file_path)
             financial_tables = []
             
-            for sheet_name, sheet_data in result['sheets'].items():
-                # Look for patterns that indicate financial data
-                financial_indicators = ['total', 'subtotal', 'cost', 'price', 'amount', 'biaya', 'harga', 'jumlah', 'rp']
-                
+            for sheet_name, sheet_data in sheets.items():
                 data = sheet_data['data']
-                for row_idx, row in enumerate(data):
-                    row_text = ' '.join(str(cell).lower() for cell in row if cell is not None)
+                for row_idx in range(len(data)):
+                    # Indicators are single words, so only text cells can match and none spans two cells
+                    text_lower = data.row_text_lower(row_idx)
+                    if not text_lower:
+                        continue
+                    
+                    row_text = ' '.join(text_lower)
                     
                     # Check if row contains financial indicators
-                    if any(indicator in row_text for indicator in financial_indicators):
+                    found = _FINANCIAL_MATCHER.find(row_text)['financial']
+                    if found:
                         # Extract surrounding context (previous and next few rows)
                         start_row = max(0, row_idx - 2)
                         end_row = min(len(data), row_idx + 10)
@@ -152,7 +392,7 @@ class XlsxParser:
                             'end_row': end_row,
                             'header_row': row_idx + 1,
                             'data': table_data,
-                            'indicators_found': [ind for ind in financial_indicators if ind in row_text]
+                            'indicators_found': [ind for ind in FINANCIAL_INDICATORS if ind in found]
                         })
                         
                         break  # Only find first financial table per sheet
@@ -163,52 +403,133 @@ class XlsxParser:
             logger.error(f"Error finding financial tables: {e}")
             return None
     
-    def _extract_sheet_data(self, worksheet, sheet_name: str) -> Dict[str, Any]:
-        """Extract data from a single worksheet"""
+    def clear_cache(self):
+        """Drop cached sheet data"""
+        with self._sheet_cache_lock:
+            self._sheet_cache.clear()
+    
+    def _read_sheets(self, file_path: str) -> Dict[str, Dict[str, Any]]:
+        """Extract every sheet once, reusing the result while the file is unchanged"""
+        stat = os.stat(file_path)
+        if stat.st_size > self.max_file_size:
+            raise ValueError(f"Excel file too large: {stat.st_size} bytes")
+        
+        key = (file_path, stat.st_mtime_ns, stat.st_size, self.max_rows_per_sheet)
+        with self._sheet_cache_lock:
+            sheets = self._sheet_cache.get(key)
+            if sheets is not None:
+                self._sheet_cache.move_to_end(key)
+                return sheets
+        
+        _prefetch_file(file_path)
+        sheets = self._read_sheets_calamine(file_path)
+        if sheets is None:
+            workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+            try:
+                sheet_names = workbook.sheetnames
+                if len(sheet_names) > 1 and stat.st_size >= _PARALLEL_SHEETS_MIN_SIZE:
+                    sheets = self._extract_sheets_parallel(file_path, sheet_names)
+                if sheets is None:
+                    sheets = {
+                        sheet_name: self._extract_sheet_data(workbook[sheet_name].iter_rows(values_only=True), sheet_name)
+                        for sheet_name in sheet_names
+                    }
+            finally:
+                workbook.close()
+        
+        with self._sheet_cache_lock:
+            self._sheet_cache[key] = sheets
+            while len(self._sheet_cache) > self._sheet_cache_size:
+                self._sheet_cache.popitem(last=False)
+        
+        return sheets
+    
+    def _read_sheets_calamine(self, file_path: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Extract every sheet with calamine; None when it is not installed or cannot read the file"""
+        if CalamineWorkbook is None:
+            return None
+        
+        try:
+            workbook = CalamineWorkbook.from_path(file_path)
+            try:
+                return {
+                    sheet_name: self._extract_sheet_data(_calamine_rows(workbook.get_sheet_by_name(sheet_name)), sheet_name)
+                    for sheet_name in workbook.sheet_names
+                }
+            finally:
+                workbook.close()
+        except Exception as e:
+            logger.warning(f"calamine could not read {file_path}, falling back to openpyxl: {e}")
+            return None
+    
+    def _extract_sheets_parallel(self, file_path: str, sheet_names: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Extract sheets in worker processes; sheet parsing is pure Python, so threads would not overlap"""
+        workers = min(os.cpu_count() or 1, len(sheet_names))
+        if workers <= 1:
+            return None
+        
         try:
-            # Get dimensions
-            max_row = min(worksheet.max_row or 0, self.max_rows_per_sheet)
-            max_col = worksheet.max_column or 0
-            
-            data = []
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                extracted = executor.map(_extract_sheet_in_worker,
+                                         [file_path] * len(sheet_names),
+                                         sheet_names,
+                                         [self.max_rows_per_sheet] * len(sheet_names))
+                return dict(zip(sheet_names, extracted))
+        except Exception as e:
+            logger.warning(f"Parallel sheet extraction failed, extracting sequentially: {e}")
+            return None
+    
+    def _extract_sheet_data(self, rows: Iterable[tuple], sheet_name: str) -> Dict[str, Any]:
+        """Extract data from the value rows of a single worksheet"""
+        try:
+            data = SparseRows()
             cell_count = 0
-            
-            # Extract cell values
-            for row in worksheet.iter_rows(min_row=1, max_row=max_row, min_col=1, max_col=max_col, values_only=True):
-                row_data = []
-                for cell_value in row:
+            row_count = 0
+            max_col = 0
+            data_analysis = SheetDataAccumulator()
+            
+            # Stream cell values; dimensions come from the rows seen rather than a pre-scan.
+            # Data types are tallied in the same pass instead of re-walking the data afterwards.
+            for row in rows:
+                if row_count >= self.max_rows_per_sheet:
+                    break
+                row_count += 1
+                if len(row) > max_col:
+                    max_col = len(row)
+                
+                # Only non-empty cells are stored; SparseRows pads rows back out on access
+                columns = []
+                values = []
+                text_lower = []
+                for col_idx, cell_value in enumerate(row):
                     if cell_value is not None:
-                        cell_count += 1
-                        
-                        # Handle different data types
-                        if isinstance(cell_value, (int, float)):
-                            row_data.append(cell_value)
-                        else:
-                            row_data.append(str(cell_value).strip())
-                    else:
-                        row_data.append(None)
+                        # Handle different data types; text is lowercased once here for every indicator scan
+                        if not isinstance(cell_value, (int, float)):
+                            cell_value = str(cell_value).strip()
+                            text_lower.append(cell_value.lower())
+                        columns.append(col_idx)
+                        values.append(cell_value)
+                        data_analysis.feed(cell_value)
                 
                 # Only add rows that have some data
-                if any(cell is not None for cell in row_data):
-                    data.append(row_data)
-            
-            # Analyze data types in the sheet
-            data_analysis = self._analyze_sheet_data_types(data)
+                if values:
+                    cell_count += len(values)
+                    data.append(len(row), columns, values, text_lower)
             
             return {
                 'name': sheet_name,
                 'data': data,
-                'row_count': max_row,
+                'row_count': row_count,
                 'column_count': max_col,
                 'cell_count': cell_count,
-                'data_analysis': data_analysis
+                'data_analysis': data_analysis.finalize()
             }
             
         except Exception as e:
             logger.error(f"Error extracting sheet data for {sheet_name}: {e}")
             return {
                 'name': sheet_name,
-                'data': [],
+                'data': SparseRows(),
                 'row_count': 0,
                 'column_count': 0,
                 'cell_count': 0,
@@ -217,76 +538,15 @@ class XlsxParser:
     
     def _analyze_sheet_data_types(self, data: List[List[Any]]) -> Dict[str, Any]:
         """Analyze data types and patterns in sheet data"""
-        analysis = {
-            'total_cells_with_data': 0,
-            'numeric_cells': 0,
-            'text_cells': 0,
-            'date_cells': 0,
-            'formula_cells': 0,
-            'monetary_values': [],
-            'large_numbers': [],
-            'percentages': []
-        }
-        
-        import re
-        from datetime import datetime
-        
+        accumulator = SheetDataAccumulator()
         for row in data:
             for cell in row:
-                if cell is None:
-                    continue
-                
-                analysis['total_cells_with_data'] += 1
-                
-                if isinstance(cell, (int, float)):
-                    analysis['numeric_cells'] += 1
-                    
-                    # Check for monetary values (large numbers)
-                    if cell > 100000:  # Assuming values > 100k might be monetary
-                        analysis['large_numbers'].append(float(cell))
-                    
-                    # Check for percentages (values between 0 and 1, or 0 and 100)
-                    if 0 <= cell <= 1:
-                        analysis['percentages'].append(float(cell))
-                    elif 0 <= cell <= 100 and cell != int(cell):
-                        analysis['percentages'].append(float(cell))
-                
-                elif isinstance(cell, datetime):
-                    analysis['date_cells'] += 1
-                
-                elif isinstance(cell, str):
-                    analysis['text_cells'] += 1
-                    
-                    # Look for monetary indicators in text
-                    if re.search(r'(?:rp|rupiah|\$|usd)', cell.lower()):
-                        # Try to extract numbers from the text
-                        numbers = re.findall(r'\d+[.,]?\d*', cell)
-                        for num_str in numbers:
-                            try:
-                                num = float(num_str.replace(',', ''))
-                                if num > 1000:
-                                    analysis['monetary_values'].append(num)
-                            except ValueError:
-                                pass
-                    
-                    # Check for percentage indicators
-                    if '%' in cell:
-                        numbers = re.findall(r'\d+[.,]?\d*', cell)
-                        for num_str in numbers:
-                            try:
-                                num = float(num_str.replace(',', ''))
-                                analysis['percentages'].append(num)
-                            except ValueError:
-                                pass
-        
-        # Limit lists to prevent memory issues
-        analysis['monetary_values'] = analysis['monetary_values'][:50]
-        analysis['large_numbers'] = analysis['large_numbers'][:50]
-        analysis['percentages'] = analysis['percentages'][:20]
-        
-        return analysis
+                if cell is not None:
+                    accumulator.feed(cell)
+        return accumulator.finalize()
     
-    def _create_workbook_summary(self, sheets: Dict[str, Any]) -> Dict[str, Any]:
+    def _create_workbook_summary(self, sheets: Dict[str, Any],
+                                 classifications: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
         """Create a summary of the workbook content"""
         summary = {
             'total_sheets': len(sheets),
@@ -296,7 +556,7 @@ class XlsxParser:
             'sheet_purposes': {}
         }
         
-        all_large_numbers = []
+        large_number_lists = []
         
         for sheet_name, sheet_data in sheets.items():
             if 'data_analysis' not in sheet_data:
@@ -307,20 +567,23 @@ class XlsxParser:
             summary['total_numeric_values'] += analysis['numeric_cells']
             
             # Collect large numbers
-            all_large_numbers.extend(analysis.get('large_numbers', []))
-            all_large_numbers.extend(analysis.get('monetary_values', []))
+            large_number_lists.append(analysis.get('large_numbers', []))
+            large_number_lists.append(analysis.get('monetary_values', []))
             
             # Guess sheet purpose based on content
-            purpose = self._guess_sheet_purpose(sheet_name, sheet_data['data'])
+            if classifications is not None:
+                purpose = classifications[sheet_name]['purpose']
+            else:
+                purpose = self._guess_sheet_purpose(sheet_name, sheet_data['data'])
             summary['sheet_purposes'][sheet_name] = purpose
         
-        # Sort and limit large numbers
-        all_large_numbers.sort(reverse=True)
-        summary['largest_values'] = all_large_numbers[:20]
+        # Largest 20 values, without sorting all of them
+        summary['largest_values'] = heapq.nlargest(20, chain.from_iterable(large_number_lists))
         
         return summary
     
-    def _analyze_excel_content(self, sheets: Dict[str, Any]) -> Dict[str, Any]:
+    def _analyze_excel_content(self, sheets: Dict[str, Any],
+                               classifications: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
         """Analyze Excel content to determine document type"""
         analysis = {
             'document_type': 'unknown',
@@ -329,37 +592,19 @@ class XlsxParser:
             'likely_purpose': 'data_storage'
         }
         
-        # Document type indicators
-        type_indicators = {
-            'budget': ['budget', 'anggaran', 'rab', 'cost', 'biaya', 'total', 'subtotal'],
-            'inventory': ['stock', 'inventory', 'item', 'quantity', 'qty', 'material'],
-            'financial': ['income', 'expense', 'profit', 'loss', 'revenue', 'pendapatan'],
-            'schedule': ['schedule', 'timeline', 'jadwal', 'date', 'week', 'month'],
-            'analysis': ['analysis', 'trend', 'comparison', 'variance', 'ratio'],
-            'report': ['report', 'summary', 'dashboard', 'kpi', 'metric']
-        }
-        
         # Count indicators across all sheets
-        indicator_counts = {doc_type: 0 for doc_type in type_indicators}
+        indicator_counts = {doc_type: 0 for doc_type in TYPE_INDICATORS}
+        cell_hits = {doc_type: set() for doc_type in TYPE_INDICATORS}
         
         for sheet_name, sheet_data in sheets.items():
-            sheet_text = sheet_name.lower()
-            
-            # Check sheet name for indicators
-            for doc_type, indicators in type_indicators.items():
-                for indicator in indicators:
-                    if indicator in sheet_text:
-                        indicator_counts[doc_type] += 2  # Sheet name is strong indicator
-            
-            # Check data content for indicators
-            for row in sheet_data.get('data', [])[:10]:  # Check first 10 rows
-                for cell in row:
-                    if cell and isinstance(cell, str):
-                        cell_text = cell.lower()
-                        for doc_type, indicators in type_indicators.items():
-                            for indicator in indicators:
-                                if indicator in cell_text:
-                                    indicator_counts[doc_type] += 1
+            if classifications is not None:
+                classification = classifications[sheet_name]
+            else:
+                classification = self._classify_sheet(sheet_name, sheet_data.get('data', []))
+            
+            for doc_type in TYPE_INDICATORS:
+                indicator_counts[doc_type] += classification['type_counts'][doc_type]
+                cell_hits[doc_type].update(classification['type_hits'][doc_type])
         
         # Determine most likely document type
         if indicator_counts:
@@ -369,42 +614,55 @@ class XlsxParser:
             if max_count > 0:
                 analysis['document_type'] = max_type
                 analysis['confidence'] = min(max_count / 10.0, 1.0)  # Normalize
-                analysis['key_indicators'] = [ind for ind in type_indicators[max_type] 
-                                            if any(ind in str(cell).lower() 
-                                                 for sheet in sheets.values() 
-                                                 for row in sheet.get('data', [])[:10] 
-                                                 for cell in row if cell)]
+                # Indicators are alphabetic, so only the text cells counted above can contain them
+                analysis['key_indicators'] = [ind for ind in TYPE_INDICATORS[max_type]
+                                            if ind in cell_hits[max_type]]
         
         return analysis
     
     def _guess_sheet_purpose(self, sheet_name: str, data: List[List[Any]]) -> str:
         """Guess the purpose of a sheet based on name and content"""
-        name_lower = sheet_name.lower()
+        return self._classify_sheet(sheet_name, data)['purpose']
+    
+    def _classify_sheet(self, sheet_name: str, data: List[List[Any]]) -> Dict[str, Any]:
+        """Document type indicators and likely purpose of a sheet from one scan of its name and first rows"""
+        name_hits = _SHEET_MATCHER.find(sheet_name.lower())
         
-        # Common sheet purposes
-        purpose_patterns = {
-            'summary': ['summary', 'ringkasan', 'total', 'overview'],
-            'data': ['data', 'raw', 'input', 'master'],
-            'calculation': ['calc', 'perhitungan', 'formula', 'analysis'],
-            'chart': ['chart', 'graph', 'grafik', 'visualization'],
-            'report': ['report', 'laporan', 'output', 'result'],
-            'budget': ['budget', 'anggaran', 'cost', 'biaya'],
-            'schedule': ['schedule', 'jadwal', 'timeline', 'planning']
-        }
+        # Sheet name is strong indicator
+        type_counts = {doc_type: 2 * len(name_hits[('type', doc_type)]) for doc_type in TYPE_INDICATORS}
+        type_hits = {doc_type: set() for doc_type in TYPE_INDICATORS}
+        content_purposes = set()
         
-        for purpose, patterns in purpose_patterns.items():
-            if any(pattern in name_lower for pattern in patterns):
-                return purpose
+        # Document types use the first 10 rows, purposes the first 5. Both vocabularies are
+        # words, so only text cells can match and no match spans two cells.
+        if isinstance(data, SparseRows):
+            leading_text = [data.row_text_lower(row_idx) for row_idx in range(min(len(data), 10))]
+        else:
+            leading_text = [[cell.lower() for cell in row if isinstance(cell, str)] for row in data[:10]]
         
-        # Analyze first few rows for clues
-        if data:
-            first_rows_text = ' '.join(str(cell).lower() for row in data[:5] for cell in row if cell)
-            
-            for purpose, patterns in purpose_patterns.items():
-                if any(pattern in first_rows_text for pattern in patterns):
-                    return purpose
+        for row_idx, text_cells in enumerate(leading_text):
+            for cell_lower in text_cells:
+                if not cell_lower:
+                    continue
+                for (kind, category), found in _SHEET_MATCHER.find(cell_lower).items():
+                    if not found:
+                        continue
+                    if kind == 'type':
+                        type_counts[category] += len(found)
+                        type_hits[category].update(found)
+                    elif row_idx < 5:
+                        content_purposes.add(category)
+        
+        # The first purpose in PURPOSE_PATTERNS order with a match wins, checking the name first
+        purpose = next((purpose for purpose in PURPOSE_PATTERNS if name_hits[('purpose', purpose)]), None)
+        if purpose is None:
+            purpose = next((purpose for purpose in PURPOSE_PATTERNS if purpose in content_purposes), 'unknown')
         
-        return 'unknown'
+        return {
+            'type_counts': type_counts,
+            'type_hits': type_hits,
+            'purpose': purpose
+        }
     
     def _format_number(self, number: Union[int, float]) -> str:
         """Format number for display"""
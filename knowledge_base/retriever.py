@@ -1,52 +1,131 @@
 from typing import List, Dict, Any, Optional
+import bisect
+import heapq
 import json
 import os
+import threading
 from utils.logger import get_logger
 
+try:
+    import orjson
+except ImportError:  # Optional dependency, faster JSON parsing
+    orjson = None
+
 logger = get_logger(__name__)
 
+KB_FILE = "knowledge_base/internal_kb.json"
+
+# Loaded knowledge base and search index of the last retriever built, keyed by the
+# KB file's (mtime, size) so new retrievers skip parsing and indexing while it is unchanged
+_kb_cache: Dict[Any, Dict[str, Any]] = {}
+_kb_cache_lock = threading.Lock()
+
+# Searchable fields as bits of an item's match mask, with their relevance weights
+_TITLE_FIELD = 1
+_CONTENT_FIELD = 2
+_KEYWORDS_FIELD = 4
+_FIELD_WEIGHTS = {_TITLE_FIELD: 3, _CONTENT_FIELD: 2, _KEYWORDS_FIELD: 1}
+
 class KnowledgeRetriever:
     """Retrieve information from construction and tax knowledge base"""
     
     def __init__(self):
+        try:
+            stat = os.stat(KB_FILE)
+            key = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            key = None  # Built-in knowledge base
+        
+        with _kb_cache_lock:
+            cached = _kb_cache.get(key)
+        if cached is not None:
+            vars(self).update(cached)
+            return
+        
         self.kb_data = self._load_knowledge_base()
+        self._build_index()
+        
+        with _kb_cache_lock:
+            _kb_cache.clear()
+            _kb_cache[key] = dict(vars(self))
     
     def search_knowledge(self, query: str, category: str = None) -> List[Dict[str, Any]]:
         """Search knowledge base for relevant information"""
         try:
-            results = []
-            query_lower = query.lower()
+            # Fields of each item that contain any query word, as a bitmask
+            matched_fields: Dict[int, int] = {}
+            for word in set(query.lower().split()):
+                for token in self._tokens_containing(word):
+                    for item_id, fields in self._index[token].items():
+                        matched_fields[item_id] = matched_fields.get(item_id, 0) | fields
             
-            for item in self.kb_data:
+            candidates = []
+            for item_id in sorted(matched_fields):
+                item = self._items_by_id[item_id]
+                
                 # Check category filter
                 if category and item.get('category') != category:
                     continue
                 
-                # Simple keyword matching
-                title_match = any(word in item.get('title', '').lower() for word in query_lower.split())
-                content_match = any(word in item.get('content', '').lower() for word in query_lower.split())
-                keywords_match = any(word in ' '.join(item.get('keywords', [])).lower() for word in query_lower.split())
-                
-                if title_match or content_match or keywords_match:
-                    # Calculate relevance score
-                    score = 0
-                    if title_match: score += 3
-                    if content_match: score += 2
-                    if keywords_match: score += 1
-                    
-                    item_copy = item.copy()
-                    item_copy['relevance_score'] = score
-                    results.append(item_copy)
+                # Calculate relevance score
+                fields = matched_fields[item_id]
+                score = sum(weight for field, weight in _FIELD_WEIGHTS.items() if fields & field)
+                candidates.append((score, item))
             
-            # Sort by relevance score
-            results.sort(key=lambda x: x.get('relevance_score', 0), reverse=True)
-            
-            return results[:10]  # Return top 10 results
+            # Top 10 by relevance score, ties kept in knowledge base order
+            top = heapq.nlargest(10, candidates, key=lambda candidate: candidate[0])
+            return [{**item, 'relevance_score': score} for score, item in top]
             
         except Exception as e:
             logger.error(f"Error searching knowledge base: {e}")
             return []
     
+    def _build_index(self):
+        """Index the whitespace-separated tokens of every item's searchable fields"""
+        self._items_by_id: Dict[int, Dict[str, Any]] = {}
+        self._index: Dict[str, Dict[int, int]] = {}
+        
+        for item_id, item in enumerate(self.kb_data):
+            self._items_by_id[item_id] = item
+            try:
+                field_texts = {
+                    _TITLE_FIELD: item.get('title', ''),
+                    _CONTENT_FIELD: item.get('content', ''),
+                    _KEYWORDS_FIELD: ' '.join(item.get('keywords', []))
+                }
+                for field, text in field_texts.items():
+                    for token in text.lower().split():
+                        postings = self._index.setdefault(token, {})
+                        postings[item_id] = postings.get(item_id, 0) | field
+            except Exception as e:
+                logger.warning(f"Skipping knowledge base item {item.get('id', item_id)} in search index: {e}")
+        
+        # Query words are matched as substrings, so the vocabulary is also kept as one
+        # newline-joined string that str.find can scan; offsets map hits back to tokens
+        self._vocabulary = list(self._index)
+        self._vocabulary_starts = []
+        offset = 0
+        for token in self._vocabulary:
+            self._vocabulary_starts.append(offset)
+            offset += len(token) + 1
+        self._vocabulary_text = '\n'.join(self._vocabulary)
+    
+    def _tokens_containing(self, word: str) -> List[str]:
+        """Indexed tokens that contain word"""
+        # A word without whitespace can only occur inside a single whitespace-separated token
+        tokens = []
+        position = self._vocabulary_text.find(word)
+        while position != -1:
+            token_number = bisect.bisect_right(self._vocabulary_starts, position) - 1
+            tokens.append(self._vocabulary[token_number])
+            
+            # Continue after this token, each token is reported once
+            next_token = token_number + 1
+            if next_token >= len(self._vocabulary):
+                break
+            position = self._vocabulary_text.find(word, self._vocabulary_starts[next_token])
+        return tokens
+    
     def get_categories(self) -> List[str]:
         """Get available knowledge categories"""
         categories = set()
@@ -102,13 +181,17 @@ class KnowledgeRetriever:
         ]
         
         # Try to load from file if exists
-        kb_file = "knowledge_base/internal_kb.json"
-        if os.path.exists(kb_file):
+        if os.path.exists(KB_FILE):
             try:
-                with open(kb_file, 'r', encoding='utf-8') as f:
-                    loaded_kb = json.load(f)
-                    logger.info(f"Loaded {len(loaded_kb)} items from knowledge base file")
-                    return loaded_kb
+                if orjson is not None:
+                    with open(KB_FILE, 'rb') as f:
+                        loaded_kb = orjson.loads(f.read())
+                else:
+                    with open(KB_FILE, 'r', encoding='utf-8') as f:
+                        loaded_kb = json.load(f)
+                
+                logger.info(f"Loaded {len(loaded_kb)} items from knowledge base file")
+                return loaded_kb
             except Exception as e:
                 logger.warning(f"Failed to load knowledge base file: {e}")
         
@@ -1,16 +1,29 @@
 import os
 import json
 import logging
-from typing import Dict, Any
+import asyncio
+import time
+from typing import Dict, Any, Tuple
+import httpx
+
+try:
+    import orjson
+except ImportError:  # Optional dependency, faster JSON parsing
+    orjson = None
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, every worker then runs the cleanup
+    fcntl = None
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from contextlib import asynccontextmanager
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import func, select
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging; DEBUG pretty-prints every webhook payload, so it is opt-in
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
 # Database setup
@@ -18,22 +31,131 @@ DATABASE_URL = os.environ.get("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable not set")
 
-# Create database engine
-engine = create_engine(
-    DATABASE_URL,
-    poolclass=StaticPool,
+# libpq sslmode values and their asyncpg "ssl" equivalents
+_ASYNCPG_SSL_MODES = {
+    "disable": False,
+    "allow": "allow",
+    "prefer": "prefer",
+    "require": "require",
+    "verify-ca": "verify-ca",
+    "verify-full": "verify-full",
+}
+
+def _async_database_url(url: str) -> Tuple[URL, Dict[str, Any]]:
+    """Point a PostgreSQL URL at the asyncpg driver, returning it with the engine connect_args"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() in ("postgresql", "postgres"):
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    
+    # asyncpg rejects libpq's "sslmode" query parameter; it takes an "ssl" connect argument instead
+    connect_args = {}
+    sslmode = parsed.query.get("sslmode")
+    if sslmode is not None:
+        parsed = parsed.difference_update_query(["sslmode"])
+        if not isinstance(sslmode, str):
+            sslmode = sslmode[-1]  # Repeated parameter, libpq uses the last one
+        if sslmode not in _ASYNCPG_SSL_MODES:
+            raise ValueError(f"Unsupported sslmode in DATABASE_URL: {sslmode}")
+        connect_args["ssl"] = _ASYNCPG_SSL_MODES[sslmode]
+    return parsed, connect_args
+
+DATABASE_ENGINE_URL, DATABASE_CONNECT_ARGS = _async_database_url(DATABASE_URL)
+
+# Create database engine; queries run on the event loop instead of blocking it.
+# Concurrent requests each check out their own pooled connection.
+engine = create_async_engine(
+    DATABASE_ENGINE_URL,
+    connect_args=DATABASE_CONNECT_ARGS,
+    pool_size=int(os.environ.get("DB_POOL_SIZE", "20")),
+    max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", "10")),
+    pool_timeout=30,
     pool_pre_ping=True,
     pool_recycle=300
 )
 
 # Create session maker
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
-# Create declarative base
-Base = declarative_base()
+# Importing models imports app.py, which runs create_all unless AUTO_CREATE_TABLES is "0". Here it
+# only runs when AUTO_CREATE_TABLES=1 is set explicitly, so booting workers do not each run the DDL checks.
+os.environ.setdefault("AUTO_CREATE_TABLES", "0")
 
 # Import models
 from models import ChatSession, ChatMessage, DocumentUpload, MemoryContext
+from utils.file_utils import cleanup_old_files_async
+
+# Old uploaded documents are removed periodically in the background; 0 disables it
+CLEANUP_INTERVAL = float(os.environ.get("CLEANUP_INTERVAL_HOURS", "6")) * 3600
+# Only the worker holding this lock runs the cleanup. Kept outside db/documents so it is never cleaned up itself.
+CLEANUP_LOCK_FILE = "db/.document_cleanup.lock"
+
+# All /bot-status counts in one statement, so the endpoint costs a single round-trip
+STATUS_COUNTS_QUERY = select(
+    select(func.count()).select_from(ChatSession).scalar_subquery(),
+    select(func.count()).select_from(ChatMessage).scalar_subquery(),
+    select(func.count()).select_from(DocumentUpload).scalar_subquery()
+)
+
+# /bot-status statistics are reused for this many seconds; one request refreshes them while others wait
+STATUS_COUNTS_TTL = 15.0
+_status_counts: Dict[str, Any] = {"expires": 0.0, "value": None}
+_status_counts_lock = asyncio.Lock()
+
+async def _get_status_counts() -> Dict[str, int]:
+    """Row counts for /bot-status, cached for STATUS_COUNTS_TTL seconds"""
+    if time.monotonic() < _status_counts["expires"]:
+        return _status_counts["value"]
+    
+    async with _status_counts_lock:
+        # Another request may have refreshed the counts while this one waited
+        if time.monotonic() < _status_counts["expires"]:
+            return _status_counts["value"]
+        
+        async with SessionLocal() as db:
+            total_sessions, total_messages, total_documents = (await db.execute(STATUS_COUNTS_QUERY)).one()
+        
+        _status_counts["value"] = {
+            "total_sessions": total_sessions,
+            "total_messages": total_messages,
+            "total_documents": total_documents
+        }
+        _status_counts["expires"] = time.monotonic() + STATUS_COUNTS_TTL
+        return _status_counts["value"]
+
+def _try_cleanup_lock():
+    """Take the cleanup lock without blocking, returning the open lock file or None if another worker has it"""
+    lock_file = open(CLEANUP_LOCK_FILE, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+async def _cleanup_documents_periodically():
+    """Remove old uploaded documents every CLEANUP_INTERVAL seconds, in one worker process only"""
+    lock_file = None
+    try:
+        while True:
+            # The lock is held for the worker's lifetime; the others retry each
+            # interval and take over if the holder exits
+            if fcntl is not None and lock_file is None:
+                try:
+                    lock_file = _try_cleanup_lock()
+                except OSError as e:
+                    logger.error(f"Error opening document cleanup lock: {e}")
+            
+            if fcntl is None or lock_file is not None:
+                try:
+                    deleted_count = await cleanup_old_files_async()
+                    if deleted_count:
+                        logger.info(f"Cleaned up {deleted_count} old documents")
+                except Exception as e:
+                    logger.error(f"Error in document cleanup: {e}")
+            await asyncio.sleep(CLEANUP_INTERVAL)
+    finally:
+        if lock_file is not None:
+            lock_file.close()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -41,48 +163,90 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting FastAPI Telegram AI Bot...")
     
-    # Create tables
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created/verified")
-    
     # Create documents directory
     os.makedirs("db/documents", exist_ok=True)
     logger.info("Documents directory created")
     
+    # One HTTP client for outbound Telegram API calls, so connections and TLS sessions are reused
+    app.state.http = httpx.AsyncClient(timeout=10.0)
+    
+    # The environment does not change after startup, so key availability is checked once
+    app.state.api_keys_status = {
+        "telegram_bot_token": bool(os.environ.get("TELEGRAM_BOT_TOKEN")),
+        "together_api_key": bool(os.environ.get("TOGETHER_API_KEY")),
+        "anthropic_api_key": bool(os.environ.get("ANTHROPIC_API_KEY"))
+    }
+    app.state.bot_info = {
+        "name": "SRSBOT",
+        "username": "SRSTeleBot"
+    }
+    
+    cleanup_task = None
+    if CLEANUP_INTERVAL > 0:
+        cleanup_task = asyncio.create_task(_cleanup_documents_periodically())
+    
     yield
     
     # Shutdown
     logger.info("Shutting down FastAPI Telegram AI Bot...")
+    if cleanup_task is not None:
+        cleanup_task.cancel()
+    await app.state.http.aclose()
+    await engine.dispose()
 
 # Create FastAPI app
 app = FastAPI(
     title="Bot Telegram AI - Konstruksi & Pajak",
     description="Bot AI komprehensif untuk analisis konstruksi dan perpajakan Indonesia",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # Route dicts are encoded with orjson rather than the stdlib encoder
+    default_response_class=ORJSONResponse if orjson is not None else JSONResponse
+)
+
+# Compress responses for clients that accept gzip; small bodies are sent as-is
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=5)
+
+def _encode_json(content: Any) -> bytes:
+    """Encode content the way the app's response class does"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+# The root response never changes, so it is encoded once
+ROOT_RESPONSE_BODY = _encode_json({
+    "message": "Bot Telegram AI - Konstruksi & Pajak",
+    "status": "running",
+    "framework": "FastAPI",
+    "endpoints": {
+        "webhook": "/webhook",
+        "health": "/health",
+        "docs": "/docs",
+        "status": "/bot-status"
+    }
+})
+
+BOT_FEATURES = (
+    "AI Chat for Construction & Tax",
+    "Document Analysis (PDF, DOCX, XLSX)",
+    "OCR for Technical Images",
+    "Volume & Cost Calculations",
+    "Construction Knowledge Base"
 )
 
 @app.get("/")
 async def root():
     """Root endpoint"""
-    return {
-        "message": "Bot Telegram AI - Konstruksi & Pajak",
-        "status": "running",
-        "framework": "FastAPI",
-        "endpoints": {
-            "webhook": "/webhook",
-            "health": "/health",
-            "docs": "/docs",
-            "status": "/bot-status"
-        }
-    }
+    return Response(content=ROOT_RESPONSE_BODY, media_type="application/json")
 
 @app.post("/webhook")
 async def webhook(request: Request):
     """Handle incoming Telegram webhook updates"""
     try:
-        data = await request.json()
-        logger.debug(f"Received webhook data: {json.dumps(data, indent=2) if data else 'No data'}")
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError, so the handler below covers both
+        data = orjson.loads(await request.body()) if orjson is not None else await request.json()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Received webhook data: {json.dumps(data, indent=2) if data else 'No data'}")
         
         if not data:
             logger.warning("No data received in webhook")
@@ -106,8 +270,8 @@ async def health_check():
     """Health check endpoint"""
     try:
         # Test database connection
-        with SessionLocal() as db:
-            db.query(ChatSession).first()
+        async with SessionLocal() as db:
+            await db.scalar(select(ChatSession.id).limit(1))
         
         return {
             "status": "healthy",
@@ -127,41 +291,18 @@ async def health_check():
         )
 
 @app.get("/bot-status")
-async def bot_status():
+async def bot_status(request: Request):
     """Get bot status and statistics"""
     try:
-        with SessionLocal() as db:
-            # Get basic statistics
-            total_sessions = db.query(ChatSession).count()
-            total_messages = db.query(ChatMessage).count()
-            total_documents = db.query(DocumentUpload).count()
-            
-            # Check API keys
-            api_keys_status = {
-                "telegram_bot_token": bool(os.environ.get("TELEGRAM_BOT_TOKEN")),
-                "together_api_key": bool(os.environ.get("TOGETHER_API_KEY")),
-                "anthropic_api_key": bool(os.environ.get("ANTHROPIC_API_KEY"))
-            }
-            
-            return {
-                "bot_info": {
-                    "name": "SRSBOT",
-                    "username": "SRSTeleBot"
-                },
-                "statistics": {
-                    "total_sessions": total_sessions,
-                    "total_messages": total_messages,
-                    "total_documents": total_documents
-                },
-                "api_keys": api_keys_status,
-                "features": [
-                    "AI Chat for Construction & Tax",
-                    "Document Analysis (PDF, DOCX, XLSX)",
-                    "OCR for Technical Images",
-                    "Volume & Cost Calculations",
-                    "Construction Knowledge Base"
-                ]
-            }
+        # Get basic statistics
+        statistics = await _get_status_counts()
+        
+        return {
+            "bot_info": request.app.state.bot_info,
+            "statistics": dict(statistics),
+            "api_keys": request.app.state.api_keys_status,
+            "features": list(BOT_FEATURES)
+        }
     except Exception as e:
         logger.error(f"Error getting bot status: {e}")
         raise HTTPException(status_code=500, detail=f"Error getting status: {str(e)}")
@@ -176,15 +317,12 @@ async def set_webhook(request: Request):
         if not webhook_url:
             raise HTTPException(status_code=400, detail="webhook_url is required")
         
-        # Import here to avoid circular imports
-        import requests
-        
         telegram_token = os.environ.get("TELEGRAM_BOT_TOKEN")
         if not telegram_token:
             raise HTTPException(status_code=500, detail="TELEGRAM_BOT_TOKEN not configured")
         
         # Set webhook with Telegram
-        response = requests.post(
+        response = await request.app.state.http.post(
             f"https://api.telegram.org/bot{telegram_token}/setWebhook",
             json={
                 "url": f"{webhook_url}/webhook",
@@ -209,4 +347,8 @@ async def set_webhook(request: Request):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=5000, log_level="info")
\ No newline at end of file
+    # "auto" picks uvloop and httptools when uvicorn[standard] is installed. Each worker process has
+    # its own database pool, so the server can open up to workers x (pool size + overflow) connections.
+    workers = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+    uvicorn.run("main_fastapi:app", host="0.0.0.0", port=5000, workers=workers,
+                loop="auto", http="auto", log_level="info")
\ No newline at end of file
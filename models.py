@@ -10,11 +10,14 @@ class ChatSession(db.Model):
     first_name = db.Column(String(64), nullable=True)
     last_name = db.Column(String(64), nullable=True)
     created_at = db.Column(DateTime, default=datetime.utcnow)
-    last_activity = db.Column(DateTime, default=datetime.utcnow)
+    last_activity = db.Column(DateTime, default=datetime.utcnow, index=True)
     is_active = db.Column(Boolean, default=True)
 
 class ChatMessage(db.Model):
     """Model for storing individual chat messages"""
+    # Messages are read per session in time order
+    __table_args__ = (db.Index('ix_chatmessage_session_ts', 'session_id', 'timestamp'),)
+    
     id = db.Column(Integer, primary_key=True)
     session_id = db.Column(Integer, db.ForeignKey('chat_session.id'), nullable=False)
     message_type = db.Column(String(20), nullable=False)  # 'user' or 'bot'
@@ -26,6 +29,8 @@ class ChatMessage(db.Model):
 
 class DocumentUpload(db.Model):
     """Model for tracking uploaded documents"""
+    __table_args__ = (db.Index('ix_documentupload_session_ts', 'session_id', 'upload_timestamp'),)
+    
     id = db.Column(Integer, primary_key=True)
     session_id = db.Column(Integer, db.ForeignKey('chat_session.id'), nullable=False)
     filename = db.Column(String(255), nullable=False)
@@ -40,6 +45,9 @@ class DocumentUpload(db.Model):
 
 class MemoryContext(db.Model):
     """Model for storing conversation context and memory"""
+    # One value per key and session; MemoryStore updates existing keys in place
+    __table_args__ = (db.Index('ix_memory_ctx_session_key', 'session_id', 'context_key', unique=True),)
+    
     id = db.Column(Integer, primary_key=True)
     session_id = db.Column(Integer, db.ForeignKey('chat_session.id'), nullable=False)
     context_key = db.Column(String(100), nullable=False)
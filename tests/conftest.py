@@ -0,0 +1,5 @@
+import os
+
+# The parsers log through utils.logger, whose file handler is created when the test modules
+# import them. Keep test runs out of the tracked logs/bot.log.
+os.environ['LOG_FILE'] = os.devnull
@@ -0,0 +1,62 @@
+import pytest
+
+import utils.keyword_matcher as keyword_matcher
+from utils.keyword_matcher import KeywordMatcher
+
+GROUPS = {
+    ('type', 'rab'): ['rab', 'biaya', 'rencana anggaran biaya'],
+    ('type', 'contract'): ['kontrak', 'pasal', 'biaya'],  # 'biaya' belongs to two groups
+    'materials': ['beton', 'beton bertulang', 'ton', 'besi'],  # Overlapping keywords
+    'cyrillic': ['бетон', 'смета', 'смета расходов', 'тон'],
+    'empty': [],
+}
+
+TEXTS = [
+    '',
+    'rencana anggaran biaya pekerjaan beton bertulang',
+    'pasal 3: kontrak tidak mencakup besi',
+    'rab',
+    'смета расходов на бетон',
+    'бетонная смесь, beton ready mix, 12 ton',
+    'tidak ada kata kunci di sini',
+    'ßeton naïve 日本語 betonbeton',
+]
+
+# Backends in the order KeywordMatcher prefers them, with the module attribute that enables each
+BACKEND_MODULES = {'hyperscan': 'hyperscan', 'ahocorasick': 'ahocorasick', 'stringzilla': 'sz', 'bytes': None}
+
+
+@pytest.fixture(params=list(BACKEND_MODULES))
+def backend(request, monkeypatch):
+    """Force KeywordMatcher onto one backend by hiding the ones it would prefer"""
+    module = BACKEND_MODULES[request.param]
+    if module is not None and getattr(keyword_matcher, module) is None:
+        pytest.skip(f'{request.param} is not installed')
+
+    for preferred in list(BACKEND_MODULES)[:list(BACKEND_MODULES).index(request.param)]:
+        monkeypatch.setattr(keyword_matcher, BACKEND_MODULES[preferred], None)
+    return request.param
+
+
+def _expected(text):
+    return {group: {keyword for keyword in keywords if keyword in text} for group, keywords in GROUPS.items()}
+
+
+def test_backend_is_forced(backend):
+    matcher = KeywordMatcher(GROUPS)
+
+    assert (matcher._database is not None) == (backend == 'hyperscan')
+    assert (matcher._automaton is not None) == (backend == 'ahocorasick')
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_find_matches_substring_search(backend, text):
+    found = KeywordMatcher(GROUPS).find(text)
+
+    assert found == _expected(text)
+    assert list(found) == list(GROUPS)  # Groups keep their order
+
+
+def test_matcher_without_keywords(backend):
+    assert KeywordMatcher({'empty': []}).find('beton') == {'empty': set()}
+    assert KeywordMatcher({}).find('beton') == {}
@@ -0,0 +1,198 @@
+import random
+import re
+
+import docx
+import pytest
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+from document_handler.parser_docx import DocxAnalysisAccumulator, DocxParser
+
+# Expected values below are the output of the parser before the streaming rewrite
+
+PARAGRAPHS = [
+    {'text': 'Spesifikasi Teknis Pekerjaan Beton', 'style': 'Title', 'alignment': 'Unknown'},
+    {'text': 'Ruang Lingkup Pekerjaan', 'style': 'Heading 1', 'alignment': 'Unknown'},
+    {'text': 'Dengan hormat, bersama surat ini kami sampaikan spesifikasi mutu beton.',
+     'style': 'Normal', 'alignment': 'JUSTIFY (3)'},
+    {'text': '1.', 'style': 'Normal', 'alignment': 'Unknown'},
+    {'text': 'Persyaratan Umum Material', 'style': 'Normal', 'alignment': 'Unknown'},
+    {'text': 'II. Metode Kerja Pengecoran', 'style': 'Normal', 'alignment': 'Unknown'},
+    {'text': 'Kolom\tBalok\nPelat lantai', 'style': 'Normal', 'alignment': 'Unknown'},
+    {'text': 'Daftar item pekerjaan', 'style': 'List Bullet', 'alignment': 'Unknown'},
+    {'text': 'Demikian kami sampaikan, terima kasih.', 'style': 'Normal', 'alignment': 'Unknown'},
+]
+
+TABLES = [
+    {
+        'table_index': 0,
+        'rows': [
+            ['Uraian', 'Volume', 'Harga'],
+            ['Beton K-225', '12,5', 'Rp 1.250.000'],
+            ['Beton K-225', '3', 'Rp 14.000'],  # Vertically merged first column
+            ['Total', 'Total', 'Rp 20.530.000'],  # Horizontally merged cell
+        ],
+        'columns': 3,
+        'has_header': True,
+    },
+    {'table_index': 1, 'rows': [['100', '2.5%'], ['Mutu', 'K-300']], 'columns': 2, 'has_header': False},
+]
+
+PARAGRAPH_TEXT = '\n'.join(paragraph['text'] for paragraph in PARAGRAPHS)
+
+EXTRACTED_TEXT = PARAGRAPH_TEXT + (
+    '\n\n--- Table 1 ---\n'
+    'Uraian | Volume | Harga\n'
+    'Beton K-225 | 12,5 | Rp 1.250.000\n'
+    'Beton K-225 | 3 | Rp 14.000\n'
+    'Total | Total | Rp 20.530.000\n'
+    '\n--- Table 2 ---\n'
+    '100 | 2.5%\n'
+    'Mutu | K-300'
+)
+
+
+@pytest.fixture
+def document_path(tmp_path):
+    """DOCX with styled paragraphs, a line break, a split numbered heading and merged table cells"""
+    document = docx.Document()
+    document.add_heading('Spesifikasi Teknis Pekerjaan Beton', level=0)
+    document.add_heading('Ruang Lingkup Pekerjaan', level=1)
+    paragraph = document.add_paragraph('Dengan hormat, bersama surat ini kami sampaikan spesifikasi mutu beton.')
+    paragraph.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+    document.add_paragraph('')
+    document.add_paragraph('1.')
+    document.add_paragraph('Persyaratan Umum Material')
+    document.add_paragraph('II. Metode Kerja Pengecoran')
+    paragraph = document.add_paragraph('Kolom\tBalok')
+    paragraph.add_run().add_break()
+    paragraph.add_run('Pelat lantai')
+    document.add_paragraph('Daftar item pekerjaan', style='List Bullet')
+    document.add_paragraph('Demikian kami sampaikan, terima kasih.')
+
+    table = document.add_table(rows=4, cols=3)
+    for row_idx, row in enumerate([['Uraian', 'Volume', 'Harga'],
+                                   ['Beton K-225', '12,5', 'Rp 1.250.000'],
+                                   ['', '3', 'Rp 14.000'],
+                                   ['Total', '', 'Rp 20.530.000']]):
+        for col_idx, value in enumerate(row):
+            table.cell(row_idx, col_idx).text = value
+    table.cell(1, 0).merge(table.cell(2, 0))  # vMerge
+    table.cell(3, 0).merge(table.cell(3, 1))  # gridSpan
+
+    table = document.add_table(rows=2, cols=2)
+    for row_idx, row in enumerate([['100', '2.5%'], ['Mutu', 'K-300']]):
+        for col_idx, value in enumerate(row):
+            table.cell(row_idx, col_idx).text = value
+
+    path = tmp_path / 'spesifikasi.docx'
+    document.save(path)
+    return str(path)
+
+
+def test_parse_docx_matches_baseline(document_path):
+    result = DocxParser().parse_docx(document_path)
+
+    assert result['success']
+    assert list(result['paragraphs']) == PARAGRAPHS
+    assert result['tables'] == TABLES
+    assert result['extracted_text'] == EXTRACTED_TEXT
+    assert sorted(result['styles_used']) == ['Heading 1', 'List Bullet', 'Normal', 'Title']
+    assert {key: result['metadata'][key] for key in ('paragraphs', 'tables', 'images', 'total_words', 'total_characters')} == {
+        'paragraphs': 9, 'tables': 2, 'images': 0, 'total_words': 76, 'total_characters': 447
+    }
+
+    analysis = result['content_analysis']
+    assert {key: value for key, value in analysis.items() if key != 'key_sections'} == {
+        'document_type': 'specification',
+        'structure_score': 0.6,
+        'content_type': 'unknown',
+        'formal_level': 'formal',
+    }
+    # Ten distinct sections, so the old set-based dedup kept all of them
+    assert sorted(analysis['key_sections']) == sorted([
+        'Spesifikasi Teknis Pekerjaan Beton', 'Ruang Lingkup Pekerjaan', 'Persyaratan Umum Material',
+        'Kolom\tBalok', 'Pelat lantai', 'Daftar item pekerjaan', 'Uraian | Volume | Harga',
+        'Mutu | K-300', '1.\nPersyaratan Umum Material', 'II. Metode Kerja Pengecoran',
+    ])
+
+
+def test_extract_tables_resolves_merged_cells(document_path):
+    assert DocxParser().extract_tables(document_path) == TABLES
+
+
+def test_text_only_mode(document_path):
+    result = DocxParser().parse_docx(document_path, sections={'text'})
+
+    assert result['success']
+    assert result['paragraph_texts'] == [paragraph['text'] for paragraph in PARAGRAPHS]
+    # Styles and alignments are not read in text-only mode
+    assert result['paragraph_styles'] == [None] * len(PARAGRAPHS)
+    assert result['paragraph_alignments'] == [None] * len(PARAGRAPHS)
+    assert list(result['paragraphs']) == [
+        {'text': paragraph['text'], 'style': None, 'alignment': None} for paragraph in PARAGRAPHS
+    ]
+    assert result['extracted_text'] == PARAGRAPH_TEXT
+    assert result['tables'] == []
+    assert 'content_analysis' not in result
+    assert result['metadata']['paragraphs'] == len(PARAGRAPHS)
+
+
+def _baseline_analysis(text, styles_used):
+    """Content analysis as the parser did it over the whole text, with the sections in match order"""
+    text_lower = text.lower()
+    doc_type_indicators = {
+        'contract': ['kontrak', 'perjanjian', 'pasal', 'ayat', 'syarat dan ketentuan', 'pihak pertama', 'pihak kedua'],
+        'specification': ['spesifikasi', 'persyaratan', 'standar', 'mutu', 'kualitas', 'metode kerja'],
+        'report': ['laporan', 'executive summary', 'kesimpulan', 'rekomendasi', 'analisis'],
+        'proposal': ['proposal', 'penawaran', 'tender', 'lelang', 'bid'],
+        'manual': ['panduan', 'petunjuk', 'prosedur', 'langkah-langkah', 'cara'],
+        'correspondence': ['surat', 'memo', 'nota', 'undangan', 'pemberitahuan']
+    }
+    max_score = 0
+    detected_type = 'unknown'
+    for doc_type, indicators in doc_type_indicators.items():
+        score = sum(1 for indicator in indicators if indicator in text_lower)
+        if score > max_score:
+            max_score = score
+            detected_type = doc_type
+
+    structure_indicators = ['Heading', 'Title', 'Subtitle', 'List', 'Caption', 'Quote']
+    structure_score = sum(1 for style in styles_used if any(indicator in style for indicator in structure_indicators))
+
+    formal_indicators = ['dengan hormat', 'yang bertanda tangan', 'demikian', 'terima kasih', 'hormat kami']
+    formal_count = sum(1 for indicator in formal_indicators if indicator in text_lower)
+
+    key_sections = []
+    for pattern in [r'(?:^|\n)([A-Z][^.\n]{5,50})(?:\n|$)',
+                    r'(?:^|\n)(\d+\.?\s+[A-Z][^.\n]{5,50})(?:\n|$)',
+                    r'(?:^|\n)([IVX]+\.?\s+[A-Z][^.\n]{5,50})(?:\n|$)']:
+        key_sections.extend(re.findall(pattern, text, re.MULTILINE)[:10])
+
+    return {
+        'document_type': detected_type,
+        'structure_score': min(structure_score / 5.0, 1.0),
+        'content_type': 'unknown',
+        # The old code deduplicated through set(), in arbitrary order; the accumulator keeps match order
+        'key_sections': list(dict.fromkeys(key_sections))[:10],
+        'formal_level': 'formal' if formal_count >= 2 else 'semi-formal' if formal_count >= 1 else 'informal'
+    }
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_accumulator_matches_whole_text_analysis(seed):
+    rng = random.Random(seed)
+    lines = [
+        'Pasal 1 Ruang Lingkup', 'Kontrak kerja konstruksi', 'Pihak Pertama dan pihak kedua',
+        'Laporan kemajuan pekerjaan', 'Kesimpulan dan rekomendasi', 'Dengan hormat,', 'Hormat kami',
+        'Spesifikasi teknis beton', 'Metode kerja pengecoran', '1.', '12', 'IV', 'II.', '3. Pekerjaan Persiapan',
+        'VII Penutup dan lampiran', 'pekerjaan tanah', 'Catatan: Mutu beton K-300.', '  ', '',
+        '\n--- Table 1 ---', 'Uraian | Volume | Harga', 'Beton K-225 | 12,5 | Rp 1.250.000',
+    ]
+    chunks = [rng.choice(lines) for _ in range(rng.randint(0, 60))]
+    styles_used = rng.sample(['Normal', 'Heading 1', 'Heading 2', 'Title', 'List Bullet', 'Quote'], rng.randint(0, 6))
+
+    accumulator = DocxAnalysisAccumulator()
+    for chunk in chunks:
+        accumulator.feed(chunk)
+
+    assert accumulator.finalize(styles_used) == _baseline_analysis('\n'.join(chunks).strip(), styles_used)
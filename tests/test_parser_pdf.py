@@ -0,0 +1,193 @@
+import random
+import re
+
+import pytest
+
+import document_handler.parser_pdf as parser_pdf
+from document_handler.parser_pdf import PdfAnalysisAccumulator, PDFParser, _page_block
+
+# Expected values below are the output of the parser before the streaming rewrite
+
+PAGES = [
+    ['RENCANA ANGGARAN BIAYA (RAB)', 'Pekerjaan struktur beton, mutu K-300',
+     'Galian tanah 125.5 m3', 'Bekisting 40 m2  Rp 1.250.000'],
+    ['Daftar kuantitas / bill of quantity', 'Besi tulangan 2500 kg, panjang 12 m',
+     'Biaya total Rp 2.350.000.000 atau 2.35 miliar', 'PPN 11 %, overhead 10%'],
+]
+
+
+def _write_pdf(path, pages):
+    """Write a minimal PDF with one Helvetica text line per entry of each page"""
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    page_ids = []
+    for lines in pages:
+        escaped = [line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') for line in lines]
+        stream = 'BT /F1 11 Tf 14 TL 50 780 Td ' + ' '.join(f'({line}) Tj T*' for line in escaped) + ' ET'
+        objects.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+                       f'/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>')
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{page_id} 0 R' for page_id in page_ids)}] /Count {len(page_ids)} >>"
+
+    output = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f'{number} 0 obj\n{body}\nendobj\n'.encode('latin-1')
+    xref_offset = len(output)
+    output += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode('latin-1')
+    for offset in offsets:
+        output += f'{offset:010d} 00000 n \n'.encode('latin-1')
+    output += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n'.encode('latin-1')
+    path.write_bytes(bytes(output))
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / 'rab.pdf'
+    _write_pdf(path, PAGES)
+    return str(path)
+
+
+@pytest.fixture(params=['pdfium', 'pypdf2'])
+def text_backend(request, monkeypatch):
+    """Run a test through both page text extractors"""
+    if request.param == 'pdfium':
+        if parser_pdf.pdfium is None:
+            pytest.skip('pypdfium2 is not installed')
+    else:
+        monkeypatch.setattr(parser_pdf, 'pdfium', None)
+    return request.param
+
+
+def test_parse_pdf_matches_baseline(pdf_path, monkeypatch):
+    monkeypatch.setattr(parser_pdf, 'pdfium', None)  # The old parser only used PyPDF2
+    result = PDFParser().parse_pdf(pdf_path)
+
+    assert result['success']
+    page_texts = ['\n'.join(lines) for lines in PAGES]
+    assert result['extracted_text'] == '\n\n'.join(
+        f'--- Page {page_number} ---\n{text}' for page_number, text in enumerate(page_texts, start=1)
+    )
+    assert list(result['pages_content']) == [
+        {'page_number': 1, 'text': page_texts[0], 'char_count': 117},
+        {'page_number': 2, 'text': page_texts[1], 'char_count': 140},
+    ]
+    assert {key: result['metadata'][key] for key in ('pages', 'total_characters', 'total_words')} == {
+        'pages': 2, 'total_characters': 289, 'total_words': 51
+    }
+
+
+def test_content_analysis_matches_baseline(pdf_path, text_backend):
+    analysis = PDFParser().parse_pdf(pdf_path)['content_analysis']
+
+    assert analysis['document_type'] == 'rab'
+    assert analysis['keywords_found'] == ['rencana anggaran biaya', 'rab', 'bill of quantity', 'daftar kuantitas']
+    assert analysis['confidence_score'] == 1.0
+    # Fewer than 20 distinct values, so the old set-based dedup kept all of them
+    assert sorted(analysis['currency_amounts']) == sorted([
+        '40', '1', '300', '11', '5', '3', '0', '250', '12', '10', '2.35',
+        '2.350.000.000', '1.250.000', '2', '125'
+    ])
+    assert sorted(analysis['numbers_found']) == sorted(['125.5', '40', '11', '12', '10', '2500'])
+
+
+def test_falls_back_to_pypdf2_when_pdfium_cannot_open(pdf_path, monkeypatch):
+    if parser_pdf.pdfium is None:
+        pytest.skip('pypdfium2 is not installed')
+
+    def fail_to_open(file_path):
+        raise parser_pdf.pdfium.PdfiumError('Failed to load document')
+
+    monkeypatch.setattr(parser_pdf.pdfium, 'PdfDocument', fail_to_open)
+    result = PDFParser().parse_pdf(pdf_path)
+
+    assert result['success']
+    assert list(result['page_texts']) == ['\n'.join(lines) for lines in PAGES]
+    assert [text.strip() for _, text in PDFParser().iter_pages(pdf_path)] == ['\n'.join(lines) for lines in PAGES]
+
+
+def test_extract_tables_respects_max_file_size(pdf_path):
+    parser = PDFParser()
+    parser.max_file_size = 100
+
+    assert parser.extract_tables(pdf_path) is None
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_compiled_table_scan_matches_python(seed, monkeypatch):
+    parser_pdf._import_table_stats()
+    if parser_pdf._line_table_stats is None:
+        pytest.skip('numba is not installed')
+
+    rng = random.Random(seed)
+    lines = ['Item | Volume | Harga', 'Beton  12,5  1.250.000', '\tBesi 3', 'Uraian pekerjaan', '  1 2 3  ', '',
+             'Total 20.530.000 | 5', 'Galian tanah 125.5 m3']
+    text = '\n'.join(rng.choice(lines) for _ in range(rng.randint(0, 60)))
+
+    compiled = PDFParser()._extract_tables_from_text(text)
+    monkeypatch.setattr(parser_pdf, '_line_table_stats', None)
+    assert compiled == PDFParser()._extract_tables_from_text(text)
+
+
+def _baseline_analysis(text):
+    """Content analysis as the parser did it over the whole text, with matches in pattern order"""
+    text_lower = text.lower()
+    document_patterns = {
+        'rab': ['rencana anggaran biaya', 'rab', 'bill of quantity', 'boq', 'daftar kuantitas'],
+        'contract': ['kontrak', 'perjanjian', 'agreement', 'syarat umum', 'syarat khusus'],
+        'specification': ['spesifikasi', 'specification', 'spec', 'mutu', 'kualitas'],
+        'drawing': ['gambar kerja', 'drawing', 'denah', 'potongan', 'detail', 'tampak'],
+        'report': ['laporan', 'report', 'progress', 'kemajuan', 'evaluasi'],
+        'permit': ['izin', 'permit', 'imb', 'siup', 'surat izin']
+    }
+    analysis = {'document_type': 'unknown', 'keywords_found': [], 'numbers_found': [],
+                'currency_amounts': [], 'confidence_score': 0.0}
+    max_matches = 0
+    for doc_type, keywords in document_patterns.items():
+        matches = sum(1 for keyword in keywords if keyword in text_lower)
+        if matches > max_matches:
+            max_matches = matches
+            analysis['document_type'] = doc_type
+            analysis['keywords_found'] = [kw for kw in keywords if kw in text_lower]
+    analysis['confidence_score'] = min(max_matches / 3.0, 1.0)
+
+    for pattern in [r'(?:Rp\.?\s*)?(\d{1,3}(?:[.,]\d{3})*(?:[.,]\d{2})?)',
+                    r'(\d+(?:\.\d+)?)\s*(?:juta|miliar|ribu)']:
+        analysis['currency_amounts'].extend(re.findall(pattern, text))
+    for pattern in [r'(\d+(?:\.\d+)?)\s*(?:m²|m³|m2|m3)',
+                    r'(\d+(?:\.\d+)?)\s*(?:meter|m)\b',
+                    r'(\d+(?:\.\d+)?)\s*%',
+                    r'(\d+(?:\.\d+)?)\s*(?:kg|ton|lt|liter)']:
+        analysis['numbers_found'].extend(re.findall(pattern, text, re.IGNORECASE))
+
+    # The old code deduplicated through set(), in arbitrary order; the accumulator keeps match order
+    analysis['currency_amounts'] = list(dict.fromkeys(analysis['currency_amounts']))[:20]
+    analysis['numbers_found'] = list(dict.fromkeys(analysis['numbers_found']))[:20]
+    return analysis
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_accumulator_caps_match_whole_text_analysis(seed):
+    rng = random.Random(seed)
+    line_makers = [
+        lambda: f"Rp {rng.randint(1, 999)}.{rng.randint(100, 999)}.000",
+        lambda: f"{rng.randint(1, 500)} juta",
+        lambda: f"luas {rng.randint(1, 900)}.{rng.randint(0, 9)} m2, volume {rng.randint(1, 90)} M3",
+        lambda: f"panjang {rng.randint(1, 300)} meter / {rng.randint(1, 50)} m",
+        lambda: f"PPN {rng.randint(1, 30)} %",
+        lambda: f"besi {rng.randint(10, 9000)} kg",
+        lambda: rng.choice(['Laporan kemajuan', 'Kontrak kerja', 'RAB / BOQ', 'gambar kerja denah', 'Surat Izin IMB']),
+    ]
+    pages = [
+        '\n'.join(rng.choice(line_makers)() for _ in range(rng.randint(0, 15)))
+        for _ in range(rng.randint(1, 8))
+    ]
+
+    accumulator = PdfAnalysisAccumulator()
+    blocks = []
+    for page_number, page_text in enumerate(pages, start=1):
+        blocks.append(_page_block(page_number, page_text))
+        accumulator.feed(blocks[-1])
+
+    assert accumulator.finalize() == _baseline_analysis(''.join(blocks).strip())
@@ -0,0 +1,255 @@
+import random
+import re
+from datetime import datetime
+
+import openpyxl
+import pytest
+
+import document_handler.parser_xlsx as parser_xlsx
+from document_handler.parser_xlsx import SheetDataAccumulator, XlsxParser
+from utils.columnar import SparseRows
+
+# Expected values below are the output of the parser before the streaming/sparse rewrite
+
+RAB_ROWS = [
+    ['Item', 'Volume', 'Harga Satuan', 'Jumlah'],
+    ['Beton K-225', 12.5, 1250000, 15625000],
+    ['Besi', 0.35, 14000, 4900],
+    [None, 'Diskon 7.5%', None, 0.1],
+    ['Total Rp 20,530,000', None, None, 20530000],
+    ['2024-01-15 00:00:00', 3, -2, 0],
+    ['PPN 11%', 11.5, 2500000.75, 'Volume beton'],
+]
+
+RINGKASAN_ROWS = [
+    [None, None, 100001, None, 'USD 5,000 contingency'],
+    [None, None, None, 42.25, None],
+]
+
+RAB_ANALYSIS = {
+    'total_cells_with_data': 24,
+    'numeric_cells': 13,
+    'text_cells': 11,
+    'date_cells': 0,
+    'formula_cells': 0,
+    'monetary_values': [20530.0],
+    'large_numbers': [1250000.0, 15625000.0, 20530000.0, 2500000.75],
+    'percentages': [12.5, 0.35, 7.5, 0.1, 0.0, 11.0, 11.5],
+}
+
+RINGKASAN_ANALYSIS = {
+    'total_cells_with_data': 3,
+    'numeric_cells': 2,
+    'text_cells': 1,
+    'date_cells': 0,
+    'formula_cells': 0,
+    'monetary_values': [5000.0],
+    'large_numbers': [100001.0],
+    'percentages': [42.25],
+}
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    """Small two-sheet workbook with gaps, text numbers and a sheet not starting at A1"""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = 'RAB Biaya'
+    for row in [
+        ['Item', 'Volume', 'Harga Satuan', 'Jumlah'],
+        ['Beton K-225', 12.5, 1250000, 15625000],
+        ['Besi', 0.35, 14000, 4900],
+        [None, 'Diskon 7.5%', None, 0.1],
+        ['Total Rp 20,530,000', None, None, 20530000],
+        [datetime(2024, 1, 15), 3.0, -2, 0],
+        ['PPN 11%', 11.5, 2500000.75, '  Volume beton  '],
+    ]:
+        sheet.append(row)
+
+    summary_sheet = workbook.create_sheet('Ringkasan')
+    summary_sheet['C2'] = 100001
+    summary_sheet['E2'] = 'USD 5,000 contingency'
+    summary_sheet['D4'] = 42.25
+
+    path = tmp_path / 'rab.xlsx'
+    workbook.save(path)
+    return str(path)
+
+
+@pytest.fixture(params=['calamine', 'openpyxl'])
+def reader(request, monkeypatch):
+    """Run a test through both sheet readers"""
+    if request.param == 'calamine':
+        if parser_xlsx.CalamineWorkbook is None:
+            pytest.skip('python-calamine is not installed')
+    else:
+        monkeypatch.setattr(parser_xlsx, 'CalamineWorkbook', None)
+    return request.param
+
+
+@pytest.fixture(params=['numba', 'numpy', 'python'])
+def accumulator_mode(request, monkeypatch):
+    """Run a test through every numeric classification path of SheetDataAccumulator"""
+    if request.param == 'numba':
+        if parser_xlsx._classify_numbers is None:
+            pytest.skip('numba is not installed')
+    elif request.param == 'numpy':
+        if parser_xlsx.np is None:
+            pytest.skip('numpy is not installed')
+        monkeypatch.setattr(parser_xlsx, '_classify_numbers', None)
+    else:
+        monkeypatch.setattr(parser_xlsx, 'np', None)
+        monkeypatch.setattr(parser_xlsx, '_classify_numbers', None)
+    return request.param
+
+
+def test_parse_xlsx_matches_baseline(workbook_path, reader, accumulator_mode):
+    result = XlsxParser().parse_xlsx(workbook_path)
+
+    assert result['success']
+    rab = result['sheets']['RAB Biaya']
+    assert list(rab['data']) == RAB_ROWS
+    assert (rab['row_count'], rab['column_count'], rab['cell_count']) == (7, 4, 24)
+    assert rab['data_analysis'] == RAB_ANALYSIS
+
+    ringkasan = result['sheets']['Ringkasan']
+    assert list(ringkasan['data']) == RINGKASAN_ROWS
+    assert (ringkasan['row_count'], ringkasan['column_count'], ringkasan['cell_count']) == (4, 5, 3)
+    assert ringkasan['data_analysis'] == RINGKASAN_ANALYSIS
+
+    assert result['summary'] == {
+        'total_sheets': 2,
+        'total_data_rows': 9,
+        'total_numeric_values': 15,
+        'largest_values': [20530000.0, 15625000.0, 2500000.75, 1250000.0, 100001.0, 20530.0, 5000.0],
+        'sheet_purposes': {'RAB Biaya': 'budget', 'Ringkasan': 'summary'},
+    }
+    assert result['content_analysis'] == {
+        'document_type': 'budget',
+        'confidence': 0.5,
+        'key_indicators': ['total'],
+        'likely_purpose': 'data_storage',
+    }
+    assert result['extracted_text'] == (
+        '--- Sheet: RAB Biaya ---\n'
+        'Item | Volume | Harga Satuan | Jumlah\n'
+        'Beton K-225 | 12.5 | 1250000 | 15625000\n'
+        'Besi | 0.35 | 14000 | 4900\n'
+        'Diskon 7.5% | 0.1\n'
+        'Total Rp 20,530,000 | 20530000\n'
+        '2024-01-15 00:00:00 | 3 | -2 | 0\n'
+        'PPN 11% | 11.5 | 2500000.75 | Volume beton\n'
+        '\n--- Sheet: Ringkasan ---\n'
+        '100001 | USD 5,000 contingency\n'
+        '42.25'
+    )
+
+
+def test_extract_numerical_data_positions(workbook_path, reader):
+    numerical_data = XlsxParser().extract_numerical_data(workbook_path)
+
+    positions = {
+        sheet_name: [(item['row'], item['column'], item['value'], item['formatted']) for item in items]
+        for sheet_name, items in numerical_data.items()
+    }
+    assert positions == {
+        'RAB Biaya': [
+            (2, 2, 12.5, '12.50'), (2, 3, 1250000, '1,250,000'), (2, 4, 15625000, '15,625,000'),
+            (3, 2, 0.35, '0.35'), (3, 3, 14000, '14,000'), (3, 4, 4900, '4,900'),
+            (4, 4, 0.1, '0.10'), (5, 4, 20530000, '20,530,000'),
+            (6, 2, 3, '3'), (6, 3, -2, '-2'),
+            (7, 2, 11.5, '11.50'), (7, 3, 2500000.75, '2,500,000.75'),
+        ],
+        'Ringkasan': [(1, 3, 100001, '100,001'), (2, 4, 42.25, '42.25')],
+    }
+    # Whole numbers come back as int from both readers
+    assert type(numerical_data['Ringkasan'][0]['value']) is int
+
+
+def test_find_financial_tables(workbook_path, reader):
+    tables = XlsxParser().find_financial_tables(workbook_path)
+
+    assert len(tables) == 1
+    table = tables[0]
+    assert table['data'] == RAB_ROWS
+    assert {key: value for key, value in table.items() if key != 'data'} == {
+        'sheet': 'RAB Biaya',
+        'start_row': 1,
+        'end_row': 7,
+        'header_row': 1,
+        'indicators_found': ['harga', 'jumlah'],
+    }
+
+
+def _baseline_analysis(cells):
+    """Data type analysis as the parser did it over a whole sheet, before streaming"""
+    analysis = {
+        'total_cells_with_data': 0,
+        'numeric_cells': 0,
+        'text_cells': 0,
+        'date_cells': 0,
+        'formula_cells': 0,
+        'monetary_values': [],
+        'large_numbers': [],
+        'percentages': []
+    }
+    for cell in cells:
+        analysis['total_cells_with_data'] += 1
+        if isinstance(cell, (int, float)):
+            analysis['numeric_cells'] += 1
+            if cell > 100000:
+                analysis['large_numbers'].append(float(cell))
+            if 0 <= cell <= 1:
+                analysis['percentages'].append(float(cell))
+            elif 0 <= cell <= 100 and cell != int(cell):
+                analysis['percentages'].append(float(cell))
+        elif isinstance(cell, str):
+            analysis['text_cells'] += 1
+            if re.search(r'(?:rp|rupiah|\$|usd)', cell.lower()):
+                for num_str in re.findall(r'\d+[.,]?\d*', cell):
+                    num = float(num_str.replace(',', ''))
+                    if num > 1000:
+                        analysis['monetary_values'].append(num)
+            if '%' in cell:
+                for num_str in re.findall(r'\d+[.,]?\d*', cell):
+                    analysis['percentages'].append(float(num_str.replace(',', '')))
+    analysis['monetary_values'] = analysis['monetary_values'][:50]
+    analysis['large_numbers'] = analysis['large_numbers'][:50]
+    analysis['percentages'] = analysis['percentages'][:20]
+    return analysis
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_accumulator_caps_and_order_match_baseline(accumulator_mode, seed):
+    rng = random.Random(seed)
+    choices = [
+        lambda: rng.randint(-5, 300000),
+        lambda: rng.choice([0, 1, 0.5, 12.75, 99.5, 100.5, -0.25, 150000.5]),
+        lambda: rng.random(),
+        lambda: f"{rng.randint(1, 99)}.{rng.randint(0, 9)}% diskon",
+        lambda: f"Rp {rng.randint(500, 9000000):,}",
+        lambda: f"USD {rng.randint(1, 99)}% of 2,500",
+        lambda: 'keterangan',
+    ]
+    cells = [rng.choice(choices)() for _ in range(rng.randint(0, 400))]
+
+    accumulator = SheetDataAccumulator()
+    for cell in cells:
+        accumulator.feed(cell)
+
+    assert accumulator.finalize() == _baseline_analysis(cells)
+
+
+def test_sparse_rows_pads_rows_on_access():
+    rows = SparseRows()
+    rows.append(5, [1, 4], [2.5, 'Beton'], ['beton'])
+    rows.append(2, [0], [7])
+
+    assert list(rows) == [[None, 2.5, None, None, 'Beton'], [7, None]]
+    assert rows[-1] == [7, None]
+    assert rows[0:1] == [[None, 2.5, None, None, 'Beton']]
+    assert rows.row_values(0) == [2.5, 'Beton']
+    assert rows.row_text_lower(0) == ['beton']
+    assert rows.row_text_lower(1) == []
+    assert list(rows.cells()) == [(0, 1, 2.5), (0, 4, 'Beton'), (1, 0, 7)]
+    assert rows == [[None, 2.5, None, None, 'Beton'], [7, None]]
@@ -0,0 +1,85 @@
+import json
+import random
+
+import pytest
+
+import knowledge_base.retriever as retriever
+from knowledge_base.retriever import KnowledgeRetriever
+
+
+def _linear_scan(kb_data, query, category=None):
+    """search_knowledge as it was before the index: substring tests over every item"""
+    results = []
+    query_lower = query.lower()
+    for item in kb_data:
+        if category and item.get('category') != category:
+            continue
+        title_match = any(word in item.get('title', '').lower() for word in query_lower.split())
+        content_match = any(word in item.get('content', '').lower() for word in query_lower.split())
+        keywords_match = any(word in ' '.join(item.get('keywords', [])).lower() for word in query_lower.split())
+        if title_match or content_match or keywords_match:
+            score = 0
+            if title_match: score += 3
+            if content_match: score += 2
+            if keywords_match: score += 1
+            item_copy = item.copy()
+            item_copy['relevance_score'] = score
+            results.append(item_copy)
+    results.sort(key=lambda x: x.get('relevance_score', 0), reverse=True)
+    return results[:10]
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    """Build every retriever from scratch instead of reusing the module-level cache"""
+    monkeypatch.setattr(retriever, '_kb_cache', {})
+
+
+@pytest.fixture
+def default_retriever(fresh_cache, monkeypatch, tmp_path):
+    monkeypatch.setattr(retriever, 'KB_FILE', str(tmp_path / 'missing.json'))
+    return KnowledgeRetriever()
+
+
+@pytest.mark.parametrize('query', [
+    'beton', 'bet', 'eton', 'BETON', 'k-2', '2%', 'm³', 'pph final', 'konstruksi beton',
+    'tekan sampel', 'a', 'ton', 'rp', 'tidak-ada', '', '   ',
+])
+@pytest.mark.parametrize('category', [None, 'standards', 'pricing', 'tax', 'unknown'])
+def test_default_kb_matches_linear_scan(default_retriever, query, category):
+    expected = _linear_scan(default_retriever.kb_data, query, category)
+
+    assert default_retriever.search_knowledge(query, category) == expected
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_loaded_kb_matches_linear_scan(fresh_cache, monkeypatch, tmp_path, seed):
+    rng = random.Random(seed)
+    syllables = ['be', 'ton', 'ko', 'lom', 'ba', 'lok', 'pa', 'sir', 'se', 'men', 'pph', 'k-3', '2%', 'ре', 'бет']
+
+    def words(count):
+        return ' '.join(''.join(rng.choice(syllables) for _ in range(rng.randint(1, 3))) for _ in range(count))
+
+    kb_data = []
+    for item_id in range(rng.randint(5, 60)):
+        item = {'id': f'item_{item_id}', 'category': rng.choice(['tax', 'pricing', 'standards'])}
+        # Fields may be missing, the scan treated them as empty
+        if rng.random() < 0.9:
+            item['title'] = words(rng.randint(1, 5)).title()
+        if rng.random() < 0.9:
+            item['content'] = words(rng.randint(0, 25))
+        if rng.random() < 0.9:
+            item['keywords'] = words(rng.randint(0, 5)).split()
+        kb_data.append(item)
+
+    kb_file = tmp_path / 'kb.json'
+    kb_file.write_text(json.dumps(kb_data, ensure_ascii=False), encoding='utf-8')
+    monkeypatch.setattr(retriever, 'KB_FILE', str(kb_file))
+    kb = KnowledgeRetriever()
+
+    for _ in range(30):
+        # Partial words, whole words and multi-word queries
+        query = ' '.join(rng.choice(syllables)[:rng.randint(1, 3)] if rng.random() < 0.5 else words(1)
+                         for _ in range(rng.randint(1, 3)))
+        category = rng.choice([None, 'tax', 'pricing'])
+        assert kb.search_knowledge(query, category) == _linear_scan(kb_data, query, category)
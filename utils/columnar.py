@@ -0,0 +1,80 @@
+from collections.abc import Sequence
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class RecordView(Sequence):
+    """Read-only list-of-dicts view over parallel column lists, building each record on access"""
+
+    def __init__(self, columns: Dict[str, List[Any]]):
+        self._columns = columns
+
+    def __len__(self) -> int:
+        for values in self._columns.values():
+            return len(values)
+        return 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return {name: values[index] for name, values in self._columns.items()}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (RecordView, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"RecordView({list(self)!r})"
+
+
+class SparseRows(Sequence):
+    """Read-only list-of-rows view that stores only non-empty cells, padding rows with None on access"""
+
+    def __init__(self):
+        self._widths: List[int] = []
+        self._columns: List[List[int]] = []
+        self._values: List[List[Any]] = []
+        self._text_lower: List[Optional[List[str]]] = []
+
+    def append(self, width: int, columns: List[int], values: List[Any], text_lower: Optional[List[str]] = None):
+        """Add a row of the given width from the column indices and values of its non-empty cells"""
+        self._widths.append(width)
+        self._columns.append(columns)
+        self._values.append(values)
+        self._text_lower.append(text_lower)
+
+    def row_values(self, index: int) -> List[Any]:
+        """Non-empty values of a row, in column order"""
+        return self._values[index]
+
+    def row_text_lower(self, index: int) -> List[str]:
+        """Lowercased string values of a row, in column order"""
+        text_lower = self._text_lower[index]
+        if text_lower is None:
+            text_lower = [value.lower() for value in self._values[index] if isinstance(value, str)]
+        return text_lower
+
+    def cells(self) -> Iterator[Tuple[int, int, Any]]:
+        """(row index, column index, value) of every non-empty cell, row by row"""
+        for row_index, (columns, values) in enumerate(zip(self._columns, self._values)):
+            for column, value in zip(columns, values):
+                yield row_index, column, value
+
+    def __len__(self) -> int:
+        return len(self._widths)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        row = [None] * self._widths[index]
+        for column, value in zip(self._columns[index], self._values[index]):
+            row[column] = value
+        return row
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (SparseRows, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"SparseRows({list(self)!r})"
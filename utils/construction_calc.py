@@ -1,9 +1,36 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Sequence
 import math
 from utils.logger import get_logger
 
+try:
+    import numpy as np
+except ImportError:  # Optional dependency, needed for batch material calculations
+    np = None
+
 logger = get_logger(__name__)
 
+# Base cost per m³ based on project type
+BASE_COSTS_PER_M3 = {
+    'residential': 2500000,  # IDR per m³
+    'commercial': 3500000,
+    'industrial': 4000000,
+    'infrastructure': 5000000,
+    'general': 3000000
+}
+
+# Materials per structure type: (material, price key, quantity per unit of volume/area, unit)
+MATERIAL_RECIPES = {
+    'concrete_slab': (
+        ('beton_ready_mix', 'beton_k300', 1.05, 'm³'),  # 5% waste factor
+        ('besi_beton', 'besi_beton_10mm', 120, 'kg'),  # kg per m³
+    ),
+    'brick_wall': (  # Volume is the wall area for this case
+        ('bata_merah', 'bata_merah', 70, 'biji'),  # bricks per m²
+        ('semen', 'semen', 2, 'sak'),  # sacks per m²
+        ('pasir', 'pasir', 0.04, 'm³'),  # m³ per m²
+    ),
+}
+
 class ConstructionCalculator:
     """Calculator for construction volumes, costs, and materials"""
     
@@ -55,25 +82,18 @@ class ConstructionCalculator:
             volume = project_data.get('volume', 0)
             project_type = project_data.get('type', 'general')
             
-            # Base cost per m³ based on project type
-            base_costs = {
-                'residential': 2500000,  # IDR per m³
-                'commercial': 3500000,
-                'industrial': 4000000,
-                'infrastructure': 5000000,
-                'general': 3000000
-            }
-            
-            base_cost_per_m3 = base_costs.get(project_type, base_costs['general'])
+            base_cost_per_m3 = BASE_COSTS_PER_M3.get(project_type, BASE_COSTS_PER_M3['general'])
             total_base_cost = volume * base_cost_per_m3
             
-            # Calculate breakdown
-            material_cost = total_base_cost * self.default_rates['material_percentage']
-            labor_cost = total_base_cost * self.default_rates['labor_percentage']
-            overhead_cost = total_base_cost * self.default_rates['overhead_percentage']
+            # Calculate breakdown; the parts are reported, so they are computed individually
+            # and the subtotal stays their exact sum
+            rates = self.default_rates
+            material_cost = total_base_cost * rates['material_percentage']
+            labor_cost = total_base_cost * rates['labor_percentage']
+            overhead_cost = total_base_cost * rates['overhead_percentage']
             
             subtotal = material_cost + labor_cost + overhead_cost
-            markup = subtotal * self.default_rates['markup_percentage']
+            markup = subtotal * rates['markup_percentage']
             total_cost = subtotal + markup
             
             return {
@@ -99,46 +119,13 @@ class ConstructionCalculator:
         """Calculate material requirements"""
         try:
             materials = {}
-            
-            if structure_type == 'concrete_slab':
-                # Concrete slab material calculation
-                materials = {
-                    'beton_ready_mix': {
-                        'quantity': volume * 1.05,  # 5% waste factor
-                        'unit': 'm³',
-                        'price': self.material_prices['beton_k300'],
-                        'total': volume * 1.05 * self.material_prices['beton_k300']
-                    },
-                    'besi_beton': {
-                        'quantity': volume * 120,  # kg per m³
-                        'unit': 'kg',
-                        'price': self.material_prices['besi_beton_10mm'],
-                        'total': volume * 120 * self.material_prices['besi_beton_10mm']
-                    }
-                }
-            
-            elif structure_type == 'brick_wall':
-                # Brick wall material calculation
-                area = volume  # Assuming volume is wall area for this case
-                materials = {
-                    'bata_merah': {
-                        'quantity': area * 70,  # bricks per m²
-                        'unit': 'biji',
-                        'price': self.material_prices['bata_merah'],
-                        'total': area * 70 * self.material_prices['bata_merah']
-                    },
-                    'semen': {
-                        'quantity': area * 2,  # sacks per m²
-                        'unit': 'sak',
-                        'price': self.material_prices['semen'],
-                        'total': area * 2 * self.material_prices['semen']
-                    },
-                    'pasir': {
-                        'quantity': area * 0.04,  # m³ per m²
-                        'unit': 'm³',
-                        'price': self.material_prices['pasir'],
-                        'total': area * 0.04 * self.material_prices['pasir']
-                    }
+            for material, price_key, factor, unit in MATERIAL_RECIPES.get(structure_type, ()):
+                price = self.material_prices[price_key]
+                materials[material] = {
+                    'quantity': volume * factor,
+                    'unit': unit,
+                    'price': price,
+                    'total': volume * factor * price
                 }
             
             # Calculate total cost
@@ -154,6 +141,34 @@ class ConstructionCalculator:
             logger.error(f"Error calculating material needs: {e}")
             return None
     
+    def calculate_material_needs_batch(self, volumes: Sequence[float], structure_type: str) -> Optional[Dict[str, Any]]:
+        """Calculate material requirements for many volumes of one structure type as arrays"""
+        try:
+            if np is None:
+                raise RuntimeError("NumPy is required for batch material calculations")
+            
+            recipe = MATERIAL_RECIPES.get(structure_type, ())
+            factors = np.array([factor for _, _, factor, _ in recipe], dtype=np.float64)
+            prices = np.array([self.material_prices[price_key] for _, price_key, _, _ in recipe], dtype=np.float64)
+            
+            # One row per volume, one column per material
+            quantities = np.multiply.outer(np.asarray(volumes, dtype=np.float64), factors)
+            totals = quantities * prices
+            
+            return {
+                'structure_type': structure_type,
+                'materials': [material for material, _, _, _ in recipe],
+                'units': [unit for _, _, _, unit in recipe],
+                'prices': prices,
+                'quantities': quantities,
+                'totals': totals,
+                'total_costs': totals.sum(axis=1)
+            }
+            
+        except Exception as e:
+            logger.error(f"Error calculating batch material needs: {e}")
+            return None
+    
     def _calc_rectangular_volume(self, dims: Dict[str, float]) -> Dict[str, Any]:
         """Calculate rectangular volume"""
         length = dims.get('length', 0)
@@ -0,0 +1,99 @@
+import re
+import threading
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+try:
+    import hyperscan
+except ImportError:  # Optional dependency, compiled multi-pattern DFA scanning
+    hyperscan = None
+
+try:
+    import ahocorasick
+except ImportError:  # Optional dependency, fall back to substring scans
+    ahocorasick = None
+
+try:
+    import stringzilla as sz
+except ImportError:  # Optional dependency, SIMD substring search for the fallback scan
+    sz = None
+
+
+class KeywordMatcher:
+    """Find which keywords of several groups occur in a text in a single pass"""
+
+    def __init__(self, groups: Dict[Hashable, Iterable[str]]):
+        self.groups = {group: list(keywords) for group, keywords in groups.items()}
+        self._database = None
+        self._automaton = None
+
+        # A keyword may belong to several groups
+        keyword_groups: Dict[str, List[Hashable]] = {}
+        for group, keywords in self.groups.items():
+            for keyword in keywords:
+                keyword_groups.setdefault(keyword, []).append(group)
+        self._keywords: List[Tuple[str, Tuple[Hashable, ...]]] = [
+            (keyword, tuple(owners)) for keyword, owners in keyword_groups.items()
+        ]
+
+        # Pre-encoded keywords for the dependency-free fallback scan
+        self._encoded_keywords = [
+            (keyword.encode('utf-8'), keyword, owners) for keyword, owners in self._keywords
+        ]
+
+        if not self._keywords:
+            return
+
+        if hyperscan is not None:
+            database = hyperscan.Database()
+            database.compile(
+                expressions=[re.escape(keyword).encode('utf-8') for keyword, _ in self._keywords],
+                ids=list(range(len(self._keywords))),
+                elements=len(self._keywords),
+                flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(self._keywords)
+            )
+            self._database = database
+            self._scan_lock = threading.Lock()  # The database owns a single scratch space
+        elif ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for keyword, owners in self._keywords:
+                automaton.add_word(keyword, (keyword, owners))
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def find(self, text: str) -> Dict[Hashable, Set[str]]:
+        """Return the set of keywords found in text for every group"""
+        hits = {group: set() for group in self.groups}
+        if not text:
+            return hits
+
+        if self._database is not None:
+            matched_ids = set()
+
+            def on_match(pattern_id, start, end, flags, context):
+                matched_ids.add(pattern_id)
+
+            with self._scan_lock:
+                self._database.scan(text.encode('utf-8'), match_event_handler=on_match)
+
+            for pattern_id in matched_ids:
+                keyword, owners = self._keywords[pattern_id]
+                for group in owners:
+                    hits[group].add(keyword)
+        elif self._automaton is not None:
+            for _, (keyword, owners) in self._automaton.iter(text):
+                for group in owners:
+                    hits[group].add(keyword)
+        elif sz is not None:
+            text_sz = sz.Str(text)
+            for group, keywords in self.groups.items():
+                hits[group].update(keyword for keyword in keywords if text_sz.find(keyword) != -1)
+        else:
+            # bytes.find avoids str's per-codepoint handling; UTF-8 keeps substring matches exact
+            text_bytes = text.encode('utf-8')
+            find = text_bytes.find
+            for encoded, keyword, owners in self._encoded_keywords:
+                if find(encoded) >= 0:
+                    for group in owners:
+                        hits[group].add(keyword)
+
+        return hits
@@ -1,33 +1,100 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import threading
 from datetime import datetime
+from typing import List, Optional
+
+# Records are queued by the logging call and written to console and file on a listener thread
+_queue = queue.SimpleQueue()
+_listener = None
+_listener_lock = threading.Lock()
+_configured_loggers = set()
+
+# Forked children (process pool workers) have no listener thread, they write directly
+_forked_child = False
+_direct_handlers: Optional[List[logging.Handler]] = None
+
+def _create_handlers() -> List[logging.Handler]:
+    """Create the console and file handlers"""
+    # Create formatter
+    formatter = logging.Formatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    # Console handler
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+    
+    # File handler (optional), LOG_FILE moves it elsewhere
+    log_file = os.environ.get('LOG_FILE', 'logs/bot.log')
+    log_dir = os.path.dirname(log_file)
+    if log_dir and not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+    
+    file_handler = logging.FileHandler(log_file)
+    file_handler.setFormatter(formatter)
+    
+    return [console_handler, file_handler]
+
+def _start_listener() -> None:
+    """Start the queue listener writing to the console and file handlers once"""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+        
+        listener = logging.handlers.QueueListener(_queue, *_create_handlers())
+        listener.start()
+        # Flush queued records before the interpreter exits
+        atexit.register(listener.stop)
+        _listener = listener
+
+def _attach_handlers(logger: logging.Logger) -> None:
+    """Route a logger through the queue, or straight to the handlers in a forked child"""
+    global _direct_handlers
+    if _forked_child:
+        if _direct_handlers is None:
+            _direct_handlers = _create_handlers()
+        for handler in _direct_handlers:
+            logger.addHandler(handler)
+    else:
+        _start_listener()
+        logger.addHandler(logging.handlers.QueueHandler(_queue))
+
+def _reset_after_fork() -> None:
+    """Switch a forked child to direct handlers, the listener thread does not survive fork"""
+    global _queue, _listener, _listener_lock, _forked_child, _direct_handlers
+    inherited_handlers = _direct_handlers or []
+    _queue = queue.SimpleQueue()
+    _listener = None
+    _listener_lock = threading.Lock()
+    _forked_child = True
+    _direct_handlers = None
+    
+    for name in _configured_loggers:
+        logger = logging.getLogger(name)
+        for handler in list(logger.handlers):
+            if isinstance(handler, logging.handlers.QueueHandler) or handler in inherited_handlers:
+                logger.removeHandler(handler)
+        _attach_handlers(logger)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
 def get_logger(name: str) -> logging.Logger:
     """Get configured logger instance"""
     logger = logging.getLogger(name)
     
-    if not logger.handlers:
-        # Create formatter
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        
-        # Console handler
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
-        
-        # File handler (optional)
-        log_dir = 'logs'
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-        
-        file_handler = logging.FileHandler(f'{log_dir}/bot.log')
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-        
-        # Set level
-        logger.setLevel(logging.DEBUG)
-        logger.propagate = False
+    if name not in _configured_loggers:
+        if not logger.handlers:
+            _attach_handlers(logger)
+            
+            # Set level
+            logger.setLevel(logging.DEBUG)
+            logger.propagate = False
+        _configured_loggers.add(name)
     
-    return logger
\ No newline at end of file
+    return logger